@@ -9,7 +9,8 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from database import get_db, User
+from database import get_db, SessionLocal, User
+from request_context import timed_phase
 import os
 
 # Security configuration
@@ -115,9 +116,10 @@ async def get_current_user(
     db: Session = Depends(get_db)
 ) -> User:
     """Get current authenticated user"""
-    token = credentials.credentials
-    user_id = verify_token(token)
-    user = get_user(db, user_id)
+    with timed_phase("auth"):
+        token = credentials.credentials
+        user_id = verify_token(token)
+        user = get_user(db, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -127,19 +129,22 @@ async def get_current_user(
     return user
 
 # Optional dependency for routes that work with or without authentication
-async def get_current_user_optional(
-    request: Request,
-    db: Session = Depends(get_db)
-) -> Optional[User]:
-    """Get current user if authenticated, None otherwise"""
+async def get_current_user_optional(request: Request) -> Optional[User]:
+    """
+    Get current user if authenticated, None otherwise
+    Anonymous requests never create a session; with a token the user is loaded
+    in a short session of its own, so the connection is back in the pool before the page renders
+    """
     # Try to get authorization header
     auth_header = request.headers.get("authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
         return None
     
     try:
-        token = auth_header.split(" ")[1]
-        user_id = verify_token(token)
-        return get_user(db, user_id)
+        with timed_phase("auth"):
+            token = auth_header.split(" ")[1]
+            user_id = verify_token(token)
+            with SessionLocal() as db:
+                return get_user(db, user_id)
     except:
         return None
\ No newline at end of file
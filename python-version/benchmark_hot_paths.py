@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the hot pure-Python paths
+Times postback parsing and validation, payout maths, JWT round trips and
+response serialization, compares them with the stored baselines and exits
+non-zero if any regressed beyond the threshold. No database or server needed.
+
+It also profiles `import main` with python -X importtime: the import time is
+checked like the other benchmarks, importing main must not create the
+database, and the integrations in LAZY_IMPORTS must not be loaded by it.
+
+Each benchmark is timed next to a fixed calibration workload and compared as
+a ratio to it, so a machine that is uniformly slower today (noisy neighbours,
+CPU throttling) doesn't read as a regression.
+
+    python benchmark_hot_paths.py                  # compare with benchmark_baselines.json
+    python benchmark_hot_paths.py --save           # record new baselines (after an intended change)
+    python benchmark_hot_paths.py --only jwt --threshold 0.5
+    python benchmark_hot_paths.py --only import    # just the import-time check
+
+Baselines are machine-specific: record them on the machine that runs the check.
+"""
+
+import os
+import sys
+import json
+import timeit
+import hashlib
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Set, Tuple
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(APP_DIR, "benchmark_baselines.json")
+DEFAULT_THRESHOLD = 0.25  # fail when more than 25% slower than the baseline
+# Baselines are the median of 3 runs; a suspected regression is re-measured and
+# only fails if every run is over the threshold, so one noisy run can't fail the check
+CONFIRMATION_RUNS = 2
+
+# Import-time profile of the app module; best of IMPORT_RUNS fresh interpreters
+IMPORT_MODULE = "main"
+IMPORT_RUNS = 5
+# Loaded on first use, never by importing the app
+LAZY_IMPORTS = ("paypalrestsdk", "paypal_client", "requests", "demo_lootably", "demo_complete_flow")
+
+CALIBRATION_DATA = [f"offer-{i:04d}" for i in range(200)]
+
+def calibration_workload():
+    """Fixed pure-Python work (sort + JSON) the benchmarks are expressed relative to"""
+    return json.dumps(sorted(CALIBRATION_DATA, reverse=True))
+
+def lootably_payload(step_type: str) -> dict:
+    """Offer as returned by the Lootably catalogue API"""
+    payload = {
+        "offerID": "LOOT_123456",
+        "name": "Raid: Shadow Legends - Reach level 20",
+        "description": "Install and reach level 20 within 14 days.",
+        "type": step_type,
+        "revenue": "4.20",
+        "currencyReward": "2.10",
+        "categories": ["game", "android"],
+        "countries": ["US", "CA", "GB"],
+        "devices": ["android"],
+        "link": "https://wall.lootably.com/click/123456",
+        "image": "https://cdn.lootably.com/offers/123456.png",
+        "conversionRate": "0.12"
+    }
+    if step_type == "multistep":
+        payload["revenue"] = payload["currencyReward"] = "variable"
+        payload["goals"] = [
+            {"goalID": f"G{i}", "description": f"Reach level {i * 5}", "revenue": "1.05", "currencyReward": "0.52"}
+            for i in range(1, 6)
+        ]
+    return payload
+
+def dashboard_payload() -> dict:
+    """Dashboard response the size the endpoint returns (10 earnings, 10 offers)"""
+    now = datetime.utcnow()
+    offer = {
+        "id": 7, "title": "Survey: Shopping Habits", "description": "Complete a 5-minute survey.",
+        "provider": "lootably", "category": "survey", "user_payout": 0.5,
+        "time_estimate": "5 mins", "is_active": True
+    }
+    return {
+        "total_earnings": 1234.56,
+        "completed_offers": 321,
+        "pending_offers": 4,
+        "account_balance": 87.65,
+        "recent_earnings": [
+            {"id": i, "amount": 0.5, "type": "task_completion",
+             "description": "Completed offer: Survey: Shopping Habits", "created_at": now - timedelta(hours=i)}
+            for i in range(10)
+        ],
+        "recent_offers": [
+            {"id": i, "offer": offer, "status": "completed", "started_at": now - timedelta(hours=i, minutes=5),
+             "completed_at": now - timedelta(hours=i), "reward_amount": 0.5}
+            for i in range(10)
+        ]
+    }
+
+def build_benchmarks() -> List[Tuple[str, Callable[[], object]]]:
+    """(name, zero-argument callable) for every benchmark; setup runs once here"""
+    from lootably_integration import LootablyAPI
+    from offer_utils import calculate_user_payout
+    from auth import create_access_token, verify_token
+    from models import OfferResponse, DashboardStats
+    from paypal_integration import PayPalPayoutManager
+
+    api = LootablyAPI()
+    singlestep = lootably_payload("singlestep")
+    multistep = lootably_payload("multistep")
+
+    # Exercise the real hash check rather than the no-secret shortcut
+    api.postback_secret = "benchmark-secret"
+    postback = ("1042", "203.0.113.7", "4.20", "2.10")
+    postback_hash = hashlib.sha256(("".join(postback) + api.postback_secret).encode()).hexdigest()
+
+    token = create_access_token({"sub": "1042"})
+
+    offer = SimpleNamespace(
+        id=7, title="Survey: Shopping Habits", description="Complete a 5-minute survey about your shopping.",
+        provider="lootably", category="survey", user_payout=0.5, time_estimate="5 mins", is_active=True
+    )
+    dashboard = dashboard_payload()
+
+    payout_manager = PayPalPayoutManager()
+    user = SimpleNamespace(balance=87.65, paypal_email="user@example.com")
+
+    return [
+        ("lootably.parse_offer.singlestep", lambda: api._parse_offer_data(singlestep)),
+        ("lootably.parse_offer.multistep", lambda: api._parse_offer_data(multistep)),
+        ("lootably.validate_postback", lambda: api.validate_postback(*postback, postback_hash)),
+        ("offers.calculate_user_payout", lambda: calculate_user_payout(4.19)),
+        ("jwt.create_access_token", lambda: create_access_token({"sub": "1042"})),
+        ("jwt.verify_token", lambda: verify_token(token)),
+        ("serialize.offer_response", lambda: OfferResponse.model_validate(offer).model_dump_json()),
+        ("serialize.dashboard_stats", lambda: DashboardStats.model_validate(dashboard).model_dump_json()),
+        ("paypal.validate_payout_request", lambda: payout_manager.validate_payout_request(user, 25.0)),
+    ]
+
+def measure(func: Callable[[], object], repeat: int) -> float:
+    """Best-of-N microseconds per call, with the loop count sized to ~0.2s per run"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number * 1_000_000
+
+def measure_relative(func: Callable[[], object], repeat: int) -> Tuple[float, float]:
+    """(microseconds per call, cost relative to the calibration workload timed either side of it)"""
+    before = measure(calibration_workload, 3)
+    microseconds = measure(func, repeat)
+    after = measure(calibration_workload, 3)
+    return microseconds, microseconds / ((before * after) ** 0.5)
+
+def profile_import(module: str) -> Tuple[float, Dict[str, int], bool]:
+    """
+    Import a module in a fresh interpreter with -X importtime
+    Returns (cumulative microseconds, self microseconds per imported module, whether the database was created)
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "import_check.db")
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=APP_DIR, env=env, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+        touched_db = os.path.exists(db_path)
+
+    cumulative, self_times = 0.0, {}
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # header line
+        self_times[name.strip()] = int(self_us)
+        if name.strip() == module and not name.startswith("  "):
+            cumulative = float(cumulative_us)
+    return cumulative, self_times, touched_db
+
+def measure_import(module: str, state: Dict[str, object]) -> Tuple[float, float]:
+    """(microseconds to import, cost relative to the calibration workload), keeping the last profile in state"""
+    profile_import(module)  # warm the bytecode cache
+    before = measure(calibration_workload, 3)
+    runs = [profile_import(module) for _ in range(IMPORT_RUNS)]
+    after = measure(calibration_workload, 3)
+    microseconds, state["self_times"], state["touched_db"] = min(runs, key=lambda run: run[0])
+    return microseconds, microseconds / ((before * after) ** 0.5)
+
+def import_problems(module: str, state: Dict[str, object]) -> List[str]:
+    """Side effects that importing the app module must not have"""
+    problems = []
+    if state.get("touched_db"):
+        problems.append(f"import {module} created the database (schema setup belongs in the lifespan)")
+    imported: Set[str] = set(state.get("self_times", {}))
+    for name in LAZY_IMPORTS:
+        if name in imported:
+            problems.append(f"import {module} loaded {name}, which should be imported on first use")
+    return problems
+
+def slowest_imports(state: Dict[str, object], limit: int = 5) -> str:
+    self_times: Dict[str, int] = state.get("self_times", {})
+    slowest = sorted(self_times.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return ", ".join(f"{name} {us / 1000:.0f}ms" for name, us in slowest)
+
+def median_result(results: List[Tuple[float, float]]) -> Tuple[float, float]:
+    """Result with the median relative cost"""
+    ordered = sorted(results, key=lambda result: result[1])
+    return ordered[(len(ordered) - 1) // 2]
+
+def best_result(results: List[Tuple[float, float]]) -> Tuple[float, float]:
+    """Result with the lowest relative cost"""
+    return min(results, key=lambda result: result[1])
+
+def load_baselines() -> Dict[str, dict]:
+    try:
+        with open(BASELINE_PATH) as baseline_file:
+            return json.load(baseline_file)
+    except (OSError, ValueError):
+        return {}
+
+def save_baselines(results: Dict[str, Tuple[float, float]], existing: Dict[str, dict]):
+    baselines = dict(existing)
+    baselines["_meta"] = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "recorded_at": datetime.utcnow().isoformat(timespec="seconds")
+    }
+    for name, (microseconds, relative) in results.items():
+        baselines[name] = {"us_per_call": round(microseconds, 3), "relative": round(relative, 4)}
+    with open(BASELINE_PATH, "w") as baseline_file:
+        json.dump(baselines, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write("\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot-path microbenchmarks with regression check")
+    parser.add_argument("--save", action="store_true", help="Store the results as the new baselines")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Allowed slowdown as a fraction (default {DEFAULT_THRESHOLD})")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark (best is kept)")
+    parser.add_argument("--only", help="Run benchmarks whose name contains this text")
+    args = parser.parse_args()
+
+    baselines = load_baselines()
+    meta = baselines.get("_meta", {})
+    if meta and meta.get("python") != platform.python_version():
+        print(f"⚠️  Baselines were recorded on Python {meta.get('python')}, running {platform.python_version()}")
+
+    import_state: Dict[str, object] = {}
+    measurers: List[Tuple[str, Callable[[], Tuple[float, float]]]] = [
+        (name, lambda func=func: measure_relative(func, args.repeat)) for name, func in build_benchmarks()
+    ]
+    measurers.append((f"import.{IMPORT_MODULE}", lambda: measure_import(IMPORT_MODULE, import_state)))
+
+    results, regressions = {}, []
+    # change is calibration-relative, so it can differ from the raw us/call ratio
+    print(f"{'benchmark':<34} {'us/call':>10} {'baseline':>10} {'change':>8}")
+    for name, measure_once in measurers:
+        if args.only and args.only not in name:
+            continue
+        runs = [measure_once()]
+        baseline = baselines.get(name, {})
+        suspect = baseline.get("relative") and runs[0][1] / baseline["relative"] - 1 > args.threshold
+        if args.save or suspect:
+            runs.extend(measure_once() for _ in range(CONFIRMATION_RUNS))
+        microseconds, relative = median_result(runs) if args.save else best_result(runs)
+        results[name] = (microseconds, relative)
+
+        if baseline.get("relative"):
+            change = relative / baseline["relative"] - 1
+            regressed = change > args.threshold
+            if regressed:
+                regressions.append(name)
+            print(f"{name:<34} {microseconds:>10.2f} {baseline['us_per_call']:>10.2f} "
+                  f"{change:>+7.0%}{'  ❌' if regressed else ''}")
+        else:
+            print(f"{name:<34} {microseconds:>10.2f} {'-':>10} {'new':>8}")
+
+    problems = []
+    if import_state:
+        print(f"\nSlowest imports under {IMPORT_MODULE}: {slowest_imports(import_state)}")
+        problems = import_problems(IMPORT_MODULE, import_state)
+        for problem in problems:
+            print(f"❌ {problem}")
+
+    if args.save:
+        save_baselines(results, baselines)
+        print(f"📝 Saved {len(results)} baselines to {os.path.basename(BASELINE_PATH)}")
+        return
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) regressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+    if regressions or problems:
+        sys.exit(1)
+    print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
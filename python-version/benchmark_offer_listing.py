@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark the /api/offers response path on a 5k-offer listing
+Compares the old path (model_validate per offer, then FastAPI's response_model
+validation + jsonable_encoder + json.dumps) with the fast_json single pass.
+No database or server needed.
+"""
+
+import asyncio
+import argparse
+import timeit
+from types import SimpleNamespace
+from typing import List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from models import OfferResponse
+from fast_json import model_list_response, DefaultJSONResponse
+
+def make_offers(count: int) -> List[SimpleNamespace]:
+    """Offer-like objects with the attributes OfferResponse reads"""
+    return [
+        SimpleNamespace(
+            id=i,
+            title=f"Offer {i}: Download and play for 5 minutes",
+            description="Install the app, open it and reach level 5 to earn your reward. " * 2,
+            provider=("lootably", "adgem", "cpalead")[i % 3],
+            category=("app", "survey", "signup", "video")[i % 4],
+            user_payout=round(0.25 + (i % 40) * 0.1, 2),
+            time_estimate=f"{5 + i % 10} mins",
+            is_active=True
+        )
+        for i in range(count)
+    ]
+
+response_field = create_response_field(name="Response_get_available_offers", type_=List[OfferResponse])
+
+def before(offers) -> bytes:
+    """Previous path: build models, then FastAPI re-validates and serializes them"""
+    content = [OfferResponse.model_validate(offer) for offer in offers]
+    serialized = asyncio.run(serialize_response(
+        field=response_field,
+        response_content=content,
+        is_coroutine=True
+    ))
+    return JSONResponse(serialized).body
+
+def after(offers) -> bytes:
+    """fast_json path: one validation, one Rust-side JSON dump"""
+    return model_list_response(OfferResponse, offers).body
+
+def main():
+    parser = argparse.ArgumentParser(description="Offer listing serialization benchmark")
+    parser.add_argument("--offers", type=int, default=5000, help="Number of offers")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per path")
+    args = parser.parse_args()
+
+    offers = make_offers(args.offers)
+    print(f"Serializing {args.offers} offers (default response class: {DefaultJSONResponse.__name__})")
+
+    results = {}
+    for name, func in (("before", before), ("after", after)):
+        func(offers)  # Warm up caches
+        best = min(timeit.repeat(lambda: func(offers), number=1, repeat=args.repeat))
+        results[name] = best
+        print(f"  {name:<7} {best * 1000:8.1f} ms  ({len(func(offers)) / 1024:.0f} KiB)")
+
+    print(f"  speedup {results['before'] / results['after']:.1f}x")
+
+if __name__ == "__main__":
+    main()
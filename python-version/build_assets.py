@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Static asset build step - run on deploy
+Writes content-hashed copies of static/css and static/js to static/dist,
+with .gz (and .br when brotli is installed) variants and a manifest.json
+that asset_url() uses to resolve fingerprinted names.
+"""
+
+import os
+import gzip
+import json
+import shutil
+import hashlib
+from static_assets import STATIC_DIR, DIST_DIR, MANIFEST_PATH
+
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    brotli = None
+
+# Extensions worth fingerprinting and compressing
+ASSET_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt")
+
+HASH_LENGTH = 12
+
+def fingerprint(relative_path: str, content: bytes) -> str:
+    """css/style.css -> css/style.<hash>.css"""
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    base, extension = os.path.splitext(relative_path)
+    return f"{base}.{digest}{extension}"
+
+def write_compressed(path: str, content: bytes):
+    """Write precompressed siblings (path.gz, path.br) of a file"""
+    # mtime=0 keeps the gzip output byte-identical between builds
+    with open(path + ".gz", "wb") as output:
+        output.write(gzip.compress(content, compresslevel=9, mtime=0))
+
+    if brotli:
+        with open(path + ".br", "wb") as output:
+            output.write(brotli.compress(content, quality=11))
+
+def build_assets() -> dict:
+    """Rebuild static/dist from scratch and return the manifest"""
+    if os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+
+    manifest = {}
+    for root, dirs, files in os.walk(STATIC_DIR):
+        # Never fingerprint our own output
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != DIST_DIR]
+
+        for filename in sorted(files):
+            if not filename.endswith(ASSET_EXTENSIONS):
+                continue
+
+            source = os.path.join(root, filename)
+            relative_path = os.path.relpath(source, STATIC_DIR).replace(os.sep, "/")
+            with open(source, "rb") as source_file:
+                content = source_file.read()
+
+            fingerprinted = fingerprint(relative_path, content)
+            target = os.path.join(DIST_DIR, fingerprinted)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as output:
+                output.write(content)
+            write_compressed(target, content)
+            # Sources get precompressed variants too, for un-fingerprinted URLs
+            write_compressed(source, content)
+            manifest[relative_path] = fingerprinted
+
+    with open(MANIFEST_PATH, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    return manifest
+
+if __name__ == "__main__":
+    manifest = build_assets()
+    print(f"✅ Built {len(manifest)} assets{'' if brotli else ' (brotli not installed - gzip only)'}")
+    for source, fingerprinted in sorted(manifest.items()):
+        print(f"  {source} -> dist/{fingerprinted}")
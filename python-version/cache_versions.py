@@ -0,0 +1,83 @@
+"""
+Version stamps for conditional GETs
+The offer catalogue has a global version bumped by syncs; each user has a ledger
+version bumped by completions, offer starts and payouts. Checking an ETag costs
+one primary-key lookup instead of rebuilding the response.
+"""
+
+import hashlib
+from typing import Optional
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from database import PlatformCounter, LedgerVersion
+from platform_counters import increment_counter
+from live_events import publish_after_commit
+
+CATALOGUE_VERSION = "catalogue.version"
+
+# Browsers must revalidate, but may keep the body for a 304
+CACHE_CONTROL = "private, no-cache"
+
+def bump_catalogue_version(db: Session):
+    """Mark the offer catalogue as changed; the caller commits"""
+    increment_counter(db, CATALOGUE_VERSION, 1)
+    publish_after_commit(db, "catalogue", {})
+
+def get_catalogue_version(db: Session) -> int:
+    value = db.query(PlatformCounter.value).filter(
+        PlatformCounter.name == CATALOGUE_VERSION
+    ).scalar()
+    return int(value or 0)
+
+def bump_ledger_version(db: Session, user_id: int):
+    """Mark a user's balance / activity as changed; the caller commits"""
+    updated = db.query(LedgerVersion).filter(LedgerVersion.user_id == user_id).update(
+        {LedgerVersion.version: LedgerVersion.version + 1},
+        synchronize_session=False
+    )
+    if updated:
+        return
+
+    try:
+        with db.begin_nested():
+            db.add(LedgerVersion(user_id=user_id, version=1))
+    except IntegrityError:
+        db.query(LedgerVersion).filter(LedgerVersion.user_id == user_id).update(
+            {LedgerVersion.version: LedgerVersion.version + 1},
+            synchronize_session=False
+        )
+
+def get_ledger_version(db: Session, user_id: int) -> int:
+    value = db.query(LedgerVersion.version).filter(
+        LedgerVersion.user_id == user_id
+    ).scalar()
+    return int(value or 0)
+
+def make_etag(*parts) -> str:
+    """Strong, opaque ETag from version parts (query values are hashed, not echoed)"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match covers this ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Compare ignoring weak validators (added by some proxies when compressing)
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+def with_etag(response: Response, etag: str, vary: Optional[str] = None) -> Response:
+    """Attach validator headers to a full response"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if vary:
+        response.headers["Vary"] = vary
+    return response
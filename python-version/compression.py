@@ -0,0 +1,283 @@
+"""
+Adaptive response compression middleware
+Compresses responses above a size threshold using the best encoding the client
+accepts (zstd / brotli when installed, gzip always) and records compression
+ratio and CPU time per route so the trade-off can be tuned.
+"""
+
+import os
+import gzip
+import time
+import threading
+import zlib
+from typing import Dict, Any, Optional, List, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+import config  # noqa: F401 - loads .env
+from request_context import route_template
+
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional
+    zstandard = None
+
+# Compression Configuration
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # bytes
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+# Content types never compressed, e.g. "text/csv" to leave streamed CSV exports alone
+COMPRESSION_EXCLUDED_TYPES = [
+    t.strip() for t in os.getenv("COMPRESSION_EXCLUDED_TYPES", "").split(",") if t.strip()
+]
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+# The compressor buffers small writes, which would hold back server-sent events
+NEVER_COMPRESSED_TYPES = ("text/event-stream",)
+
+def available_encodings() -> List[str]:
+    """Supported encodings, preferred first"""
+    encodings = []
+    if zstandard:
+        encodings.append("zstd")
+    if brotli:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+SUPPORTED_ENCODINGS = available_encodings()
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported encoding the client accepts (q > 0), or None"""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    candidates = [
+        (accepted.get(encoding, accepted.get("*", 0.0)), -index, encoding)
+        for index, encoding in enumerate(SUPPORTED_ENCODINGS)
+    ]
+    quality, _, encoding = max(candidates)
+    return encoding if quality > 0 else None
+
+class _StreamCompressor:
+    """Incremental compressor with a uniform compress / flush interface"""
+
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            # wbits 31 = gzip container
+            self._compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+        self.encoding = encoding
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+def compress_body(encoding: str, body: bytes) -> bytes:
+    """One-shot compression of a complete body"""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compress(body)
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL)
+
+class CompressionStats:
+    """Per-route compression ratio and CPU time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, route: str, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float):
+        with self._lock:
+            stats = self._routes.setdefault(route, {
+                "responses": 0,
+                "bytes_in": 0,
+                "bytes_out": 0,
+                "cpu_seconds": 0.0,
+                "encodings": {}
+            })
+            stats["responses"] += 1
+            stats["bytes_in"] += bytes_in
+            stats["bytes_out"] += bytes_out
+            stats["cpu_seconds"] += cpu_seconds
+            stats["encodings"][encoding] = stats["encodings"].get(encoding, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {}
+            for route, stats in self._routes.items():
+                routes[route] = {
+                    **stats,
+                    "encodings": dict(stats["encodings"]),
+                    "ratio": round(stats["bytes_out"] / stats["bytes_in"], 3) if stats["bytes_in"] else None,
+                    "cpu_ms_per_response": round(stats["cpu_seconds"] * 1000 / stats["responses"], 3)
+                }
+        return {
+            "enabled": COMPRESSION_ENABLED,
+            "min_size": COMPRESSION_MIN_SIZE,
+            "encodings": SUPPORTED_ENCODINGS,
+            "excluded_types": COMPRESSION_EXCLUDED_TYPES,
+            "routes": routes
+        }
+
+compression_stats = CompressionStats()
+
+def _is_compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    if not content_type.startswith(COMPRESSIBLE_TYPES):
+        return False
+    return content_type not in COMPRESSION_EXCLUDED_TYPES and content_type not in NEVER_COMPRESSED_TYPES
+
+class CompressionMiddleware:
+    """ASGI middleware that compresses large or streamed text responses"""
+
+    def __init__(self, app, min_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+
+        await _CompressedResponder(self.app, encoding, self.min_size)(scope, receive, send)
+
+class _CompressedResponder:
+    def __init__(self, app, encoding: str, min_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.min_size = min_size
+        self.start_message: Optional[Dict[str, Any]] = None
+        self.active = False
+        self.started = False
+        self.compressor: Optional[_StreamCompressor] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    async def __call__(self, scope, receive, send):
+        self.scope = scope
+        self.send = send
+        try:
+            await self.app(scope, receive, self.send_wrapper)
+        finally:
+            if self.start_message is not None and not self.started:
+                # The app raised or returned before any body; release the held start as an empty response
+                self.started = True
+                headers = MutableHeaders(raw=self.start_message["headers"])
+                headers["Content-Length"] = "0"
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": b""})
+
+    def _timed(self, func, *args) -> bytes:
+        # Compression runs on the event loop thread, so thread CPU time is per-request
+        started = time.thread_time()
+        result = func(*args)
+        self.cpu_seconds += time.thread_time() - started
+        return result
+
+    def _record(self):
+        compression_stats.record(route_template(self.scope), self.encoding,
+                                 self.bytes_in, self.bytes_out, self.cpu_seconds)
+
+    async def send_wrapper(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Hold the headers until we know the body size
+            self.start_message = message
+            self.active = _is_compressible(Headers(raw=message["headers"]))
+            return
+
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        if not self.active:
+            if not self.started:
+                self.started = True
+                await self.send(self.start_message)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started and not more_body:
+            # Complete body in one message - compress only above the threshold
+            self.started = True
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if len(body) < self.min_size:
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+
+            compressed = self._timed(compress_body, self.encoding, body)
+            self.bytes_in, self.bytes_out = len(body), len(compressed)
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            self._weaken_etag(headers)
+            await self.send(self.start_message)
+            await self.send({"type": "http.response.body", "body": compressed})
+            self._record()
+            return
+
+        if not self.started:
+            # Streamed response - compress chunk by chunk
+            self.started = True
+            self.compressor = _StreamCompressor(self.encoding)
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            if "content-length" in headers:
+                del headers["content-length"]
+            headers.add_vary_header("Accept-Encoding")
+            self._weaken_etag(headers)
+            await self.send(self.start_message)
+
+        self.bytes_in += len(body)
+        chunk = self._timed(self.compressor.compress, body)
+        if not more_body:
+            chunk += self._timed(self.compressor.flush)
+        self.bytes_out += len(chunk)
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        if not more_body:
+            self._record()
+
+    @staticmethod
+    def _weaken_etag(headers: MutableHeaders):
+        # The encoded body differs byte-for-byte from the identity one
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
@@ -0,0 +1,9 @@
+"""
+Environment loading
+Reads .env once per process. Modules import this before reading os.getenv,
+so the file isn't re-parsed by every module that needs configuration.
+"""
+
+from dotenv import load_dotenv
+
+load_dotenv()
@@ -0,0 +1,159 @@
+"""
+Precomputed per-user dashboard summaries
+One row per user holds the pending offer count and the last N earnings and offers,
+so the dashboard is a single primary-key read
+"""
+
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.exc import IntegrityError
+from database import DashboardSummary, UserOffer, Offer, Earning
+from models import OfferResponse
+
+# Number of recent earnings / offers kept in the summary
+DASHBOARD_RECENT_LIMIT = 10
+
+PENDING_STATUSES = ("started", "in_progress")
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def earning_entry(earning: Earning) -> Dict[str, Any]:
+    """Compact EarningResponse-shaped dict for the summary blob"""
+    return {
+        "id": earning.id,
+        "amount": earning.amount,
+        "type": earning.type,
+        "description": earning.description,
+        "created_at": _iso(earning.created_at)
+    }
+
+def user_offer_entry(user_offer: UserOffer, offer: Offer) -> Dict[str, Any]:
+    """Compact UserOfferResponse-shaped dict for the summary blob"""
+    return {
+        "id": user_offer.id,
+        "offer": OfferResponse.model_validate(offer).model_dump(mode="json"),
+        "status": user_offer.status,
+        "started_at": _iso(user_offer.started_at),
+        "completed_at": _iso(user_offer.completed_at),
+        "reward_amount": user_offer.reward_amount
+    }
+
+def build_dashboard_summary(db: Session, user_id: int) -> DashboardSummary:
+    """Compute a user's summary from scratch (not added to the session)"""
+    recent_earnings = db.query(Earning).filter(
+        Earning.user_id == user_id
+    ).order_by(Earning.created_at.desc()).limit(DASHBOARD_RECENT_LIMIT).all()
+
+    # Load each offer in the same SELECT instead of one lazy load per row
+    recent_offers = db.query(UserOffer).options(
+        joinedload(UserOffer.offer)
+    ).filter(
+        UserOffer.user_id == user_id
+    ).order_by(UserOffer.created_at.desc()).limit(DASHBOARD_RECENT_LIMIT).all()
+
+    pending_offers = db.query(UserOffer).filter(
+        UserOffer.user_id == user_id,
+        UserOffer.status.in_(PENDING_STATUSES)
+    ).count()
+
+    return DashboardSummary(
+        user_id=user_id,
+        pending_offers=pending_offers,
+        recent_earnings=[earning_entry(e) for e in recent_earnings],
+        recent_offers=[user_offer_entry(o, o.offer) for o in recent_offers]
+    )
+
+def get_dashboard_summary(db: Session, user_id: int) -> DashboardSummary:
+    """
+    Get a user's dashboard summary with a primary-key read
+    The row is built and stored on first access
+    """
+    summary = db.get(DashboardSummary, user_id)
+    if summary:
+        return summary
+
+    summary = build_dashboard_summary(db, user_id)
+    db.add(summary)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Built concurrently by another request
+        db.rollback()
+        summary = db.get(DashboardSummary, user_id)
+    return summary
+
+def rebuild_dashboard_summary(db: Session, user_id: int) -> DashboardSummary:
+    """Recompute and store a user's summary, replacing any existing row"""
+    fresh = build_dashboard_summary(db, user_id)
+    summary = db.merge(fresh)
+    db.commit()
+    return summary
+
+def _locked_summary(db: Session, user_id: int) -> Optional[DashboardSummary]:
+    # Row lock so concurrent completions for one user don't lose updates
+    return db.query(DashboardSummary).filter(
+        DashboardSummary.user_id == user_id
+    ).with_for_update().first()
+
+def _summary_to_update(db: Session, user_id: int) -> Optional[DashboardSummary]:
+    """
+    Locked summary row to update, or None when it was missing and has just been built
+    The built row already includes the caller's flushed change. Building it here means a
+    dashboard read that built its row before this change loses the insert race to ours,
+    instead of storing its stale row after we commit.
+    """
+    summary = _locked_summary(db, user_id)
+    if summary:
+        return summary
+
+    try:
+        with db.begin_nested():
+            db.add(build_dashboard_summary(db, user_id))
+        return None
+    except IntegrityError:
+        # Inserted by a concurrent dashboard read, from data without this change
+        return _locked_summary(db, user_id)
+
+def _push_front(entries: Optional[List[Dict[str, Any]]], entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Replace any existing entry for the same id, newest first
+    entries = [e for e in (entries or []) if e.get("id") != entry["id"]]
+    return [entry] + entries[:DASHBOARD_RECENT_LIMIT - 1]
+
+def record_offer_started(db: Session, user_offer: UserOffer, offer: Offer):
+    """
+    Update the summary for a newly started offer
+    Must run in the same transaction as the UserOffer insert; the caller commits
+    """
+    summary = _summary_to_update(db, user_offer.user_id)
+    if not summary:
+        return
+
+    summary.pending_offers = (summary.pending_offers or 0) + 1
+    summary.recent_offers = _push_front(summary.recent_offers, user_offer_entry(user_offer, offer))
+
+def record_offer_completed(db: Session, user_offer: UserOffer, offer: Offer,
+                           earning: Earning, was_pending: bool, is_new: bool):
+    """
+    Update the summary for a completed offer and its earning
+    is_new means the UserOffer row was created by this completion
+    Must run in the same transaction as the completion; the caller commits
+    """
+    summary = _summary_to_update(db, user_offer.user_id)
+    if not summary:
+        return
+
+    if was_pending:
+        summary.pending_offers = max(0, (summary.pending_offers or 0) - 1)
+
+    summary.recent_earnings = _push_front(summary.recent_earnings, earning_entry(earning))
+
+    entry = user_offer_entry(user_offer, offer)
+    recent_offers = list(summary.recent_offers or [])
+    if is_new:
+        recent_offers = _push_front(recent_offers, entry)
+    else:
+        # Keep its position - the list is ordered by start time
+        recent_offers = [entry if e.get("id") == entry["id"] else e for e in recent_offers]
+    summary.recent_offers = recent_offers
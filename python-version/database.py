@@ -2,16 +2,16 @@
 Database models and configuration
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, JSON
+from sqlalchemy import create_engine, Column, Integer, String, Float, Date, DateTime, Boolean, Text, ForeignKey, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from sqlalchemy.sql import func
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+import config  # noqa: F401 - loads .env
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./offerwall.db")
+# Create missing tables when the app starts; set to false in production and run `python database.py` once per deploy
+DB_AUTO_CREATE_SCHEMA = os.getenv("DB_AUTO_CREATE_SCHEMA", "true").lower() == "true"
 
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -113,6 +113,11 @@ class Payout(Base):
     
     # Relationships
     user = relationship("User", back_populates="payouts")
+    
+    # Keyset pagination of a user's payout history
+    __table_args__ = (
+        Index("ix_payouts_user_id_id", "user_id", "id"),
+    )
 
 class OfferCallback(Base):
     __tablename__ = "offer_callbacks"
@@ -129,9 +134,67 @@ class OfferCallback(Base):
     processed_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class PlatformCounter(Base):
+    __tablename__ = "platform_counters"
+    
+    name = Column(String(100), primary_key=True)  # offers.completed, payouts.pending.count, etc.
+    value = Column(Float, nullable=False, default=0.0)
+
+class RevenueRollup(Base):
+    __tablename__ = "revenue_rollups"
+    
+    day = Column(Date, primary_key=True)  # UTC completion date
+    provider = Column(String(50), primary_key=True)
+    category = Column(String(50), primary_key=True)
+    completions = Column(Integer, nullable=False, default=0)
+    user_payout = Column(Float, nullable=False, default=0.0)  # Paid to users
+    provider_revenue = Column(Float, nullable=False, default=0.0)  # Received from the provider
+    platform_margin = Column(Float, nullable=False, default=0.0)  # provider_revenue - user_payout
+
+class DashboardSummary(Base):
+    __tablename__ = "dashboard_summaries"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    pending_offers = Column(Integer, default=0)  # started + in_progress user offers
+    recent_earnings = Column(JSON)  # Last N earnings, EarningResponse shape
+    recent_offers = Column(JSON)  # Last N user offers, UserOfferResponse shape
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class LedgerVersion(Base):
+    __tablename__ = "ledger_versions"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)  # Bumped by completions, offer starts and payouts
+
+class SyncLease(Base):
+    __tablename__ = "sync_leases"
+    
+    name = Column(String(50), primary_key=True)  # lootably_sync, etc.
+    owner = Column(String(100), nullable=False)  # host:pid of the lease holder
+    expires_at = Column(DateTime, nullable=False)  # UTC, lease is free after this
+    acquired_at = Column(DateTime)
+
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+    
+    id = Column(String(36), primary_key=True)  # uuid4 hex
+    kind = Column(String(50), nullable=False, index=True)  # lootably_sync, demo_offers
+    status = Column(String(20), default="queued")  # queued, running, completed, failed
+    progress = Column(JSON)  # fetched, upserted, deactivated, elapsed
+    result = Column(JSON)
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    submitted_at = Column(DateTime)  # UTC
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
 # Database functions
 def get_db():
-    """Get database session"""
+    """
+    Get database session
+    The session checks out a connection on its first query, not here, and returns it on
+    commit / rollback / close
+    """
     db = SessionLocal()
     try:
         yield db
@@ -140,4 +203,8 @@ def get_db():
 
 def init_db():
     """Create all tables"""
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+
+if __name__ == "__main__":
+    init_db()
+    print(f"Schema is up to date ({engine.url.render_as_string(hide_password=True)})")
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from database import Offer
 from offer_utils import create_offer_from_external
 from lootably_integration import LootablyOffer
+from cache_versions import bump_catalogue_version
 
 def create_demo_lootably_offers(db: Session) -> int:
     """
@@ -133,6 +134,8 @@ def create_demo_lootably_offers(db: Session) -> int:
             print(f"Error creating demo offer {demo_data['offer_id']}: {e}")
             continue
     
+    # Invalidate cached offer listings (ETag)
+    bump_catalogue_version(db)
     db.commit()
     print(f"Created {synced_count} demo Lootably offers")
     return synced_count
@@ -0,0 +1,109 @@
+"""
+User earnings history and exports
+Pages use keyset pagination; exports stream rows from a server-side cursor
+so a user's full history is never held in memory
+"""
+
+import csv
+import io
+import json
+from typing import Dict, Any, Optional, Iterator
+from sqlalchemy.orm import Session
+from database import SessionLocal, Earning
+from pagination import encode_id_cursor, decode_id_cursor
+
+# Earnings history pagination
+EARNINGS_PAGE_SIZE = 50
+EARNINGS_MAX_PAGE_SIZE = 200
+
+# Rows fetched per round trip while exporting
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = ["id", "amount", "type", "description", "user_offer_id", "created_at"]
+
+def _earning_columns(db: Session, user_id: int):
+    return db.query(
+        Earning.id,
+        Earning.amount,
+        Earning.type,
+        Earning.description,
+        Earning.user_offer_id,
+        Earning.created_at
+    ).filter(Earning.user_id == user_id)
+
+def _earning_dict(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "amount": row.amount,
+        "type": row.type,
+        "description": row.description,
+        "user_offer_id": row.user_offer_id,
+        "created_at": row.created_at.isoformat() if row.created_at else None
+    }
+
+def get_user_earnings_page(db: Session, user_id: int,
+                           cursor: Optional[str] = None,
+                           limit: int = EARNINGS_PAGE_SIZE) -> Dict[str, Any]:
+    """Get one page of a user's earnings, newest first (keyset on id)"""
+    limit = max(1, min(limit, EARNINGS_MAX_PAGE_SIZE))
+    query = _earning_columns(db, user_id)
+
+    if cursor:
+        query = query.filter(Earning.id < decode_id_cursor(cursor))
+
+    # Fetch one extra row to know whether there is a next page
+    rows = query.order_by(Earning.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_id_cursor(rows[-1].id)
+
+    return {
+        "earnings": [_earning_dict(row) for row in rows],
+        "next_cursor": next_cursor
+    }
+
+def _stream_earnings(user_id: int) -> Iterator:
+    """
+    Yield a user's earnings oldest first, EXPORT_BATCH_SIZE rows per fetch
+    Uses its own session so it can outlive the request dependency
+    """
+    db = SessionLocal()
+    try:
+        query = _earning_columns(db, user_id).order_by(Earning.id).yield_per(EXPORT_BATCH_SIZE)  # Server-side cursor where the driver supports it
+        for row in query:
+            yield row
+    finally:
+        db.close()
+
+def iter_earnings_csv(user_id: int) -> Iterator[str]:
+    """Stream earnings as CSV, one chunk per batch of rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+
+    count = 0
+    for row in _stream_earnings(user_id):
+        earning = _earning_dict(row)
+        writer.writerow([earning[column] for column in EXPORT_COLUMNS])
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    yield buffer.getvalue()
+
+def iter_earnings_ndjson(user_id: int) -> Iterator[str]:
+    """Stream earnings as newline-delimited JSON, one chunk per batch of rows"""
+    lines = []
+    for row in _stream_earnings(user_id):
+        lines.append(json.dumps(_earning_dict(row)))
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+
+    if lines:
+        yield "\n".join(lines) + "\n"
@@ -0,0 +1,51 @@
+"""
+Fast JSON responses
+Routes build their Pydantic models once and return the serialized bytes directly,
+so FastAPI does not validate and serialize the same objects a second time
+"""
+
+from functools import lru_cache
+from typing import Any, Iterable, List, Type
+from pydantic import BaseModel, TypeAdapter
+from fastapi.responses import JSONResponse, Response
+from request_context import timed_phase
+
+try:
+    import orjson  # noqa: F401 - ORJSONResponse needs it at render time
+    from fastapi.responses import ORJSONResponse as _BaseJSONResponse
+except ImportError:  # orjson is optional
+    _BaseJSONResponse = JSONResponse
+
+class DefaultJSONResponse(_BaseJSONResponse):
+    """orjson (when installed) response that reports render time as Server-Timing serialization"""
+
+    def render(self, content: Any) -> bytes:
+        with timed_phase("serialization"):
+            return super().render(content)
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """Cached TypeAdapter for List[model] - building one is expensive"""
+    return TypeAdapter(List[model])
+
+def model_response(instance: BaseModel, status_code: int = 200) -> Response:
+    """Return an already-validated model without re-validation"""
+    with timed_phase("serialization"):
+        content = instance.model_dump_json()
+    return Response(
+        content=content,
+        status_code=status_code,
+        media_type="application/json"
+    )
+
+def model_list_response(model: Type[BaseModel], objects: Iterable[Any], status_code: int = 200) -> Response:
+    """Validate ORM objects into List[model] and serialize them in one pass each"""
+    adapter = list_adapter(model)
+    with timed_phase("serialization"):
+        validated = adapter.validate_python(list(objects), from_attributes=True)
+        content = adapter.dump_json(validated)
+    return Response(
+        content=content,
+        status_code=status_code,
+        media_type="application/json"
+    )
@@ -0,0 +1,171 @@
+"""
+Live updates over server-sent events
+In-process pub/sub: complete_offer, the payout flow and catalogue bumps queue
+events on their session, and they are published once that transaction commits
+(never for a rollback). GET /api/events streams a user's events to their open
+tabs, so the dashboard stops polling.
+
+Subscribers are per worker. With several workers the change may have been
+committed by another one, so every stream also compares the user's ledger
+version and the catalogue version at each heartbeat and sends a `resync`
+event when they moved without a local event.
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+import config  # noqa: F401 - loads .env
+from database import SessionLocal
+
+# Live Events Configuration
+LIVE_EVENTS_ENABLED = os.getenv("LIVE_EVENTS_ENABLED", "true").lower() == "true"
+# Keep-alive comment and cross-worker version check interval
+LIVE_EVENTS_HEARTBEAT_SECONDS = float(os.getenv("LIVE_EVENTS_HEARTBEAT_SECONDS", "15"))
+# Events buffered per stream; a slow client that falls further behind gets a resync instead
+LIVE_EVENTS_QUEUE_SIZE = int(os.getenv("LIVE_EVENTS_QUEUE_SIZE", "100"))
+# Streams end after this long and the client reconnects; uvicorn only drains finished
+# responses on shutdown, and reconnects spread streams over restarted workers
+LIVE_EVENTS_MAX_STREAM_SECONDS = float(os.getenv("LIVE_EVENTS_MAX_STREAM_SECONDS", "300"))
+
+# Client reconnect delay (ms), sent as the SSE retry field
+RECONNECT_MS = 5000
+
+RESYNC = {"event": "resync", "data": {}}
+
+class Subscription:
+    """One open stream: its event loop and queue"""
+
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=LIVE_EVENTS_QUEUE_SIZE)
+
+    def _put(self, message: Dict[str, Any]):
+        if self.queue.full():
+            # Too far behind to replay - drop the backlog and let the client refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = RESYNC
+        self.queue.put_nowait(message)
+
+    def deliver(self, message: Dict[str, Any]):
+        """Thread-safe: publishers run on the event loop, in the threadpool and in job threads"""
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass  # loop closed during shutdown
+
+class EventBroker:
+    """Per-process fan-out of events to the streams of one user, or of every user"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self.published = 0
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, event_type: str, data: Dict[str, Any], user_id: Optional[int] = None):
+        """Send to one user's streams, or to all streams when user_id is None"""
+        message = {"event": event_type, "data": data}
+        with self._lock:
+            if user_id is None:
+                targets = [s for subscriptions in self._subscriptions.values() for s in subscriptions]
+            else:
+                targets = list(self._subscriptions.get(user_id, ()))
+            self.published += 1
+        for subscription in targets:
+            subscription.deliver(message)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": LIVE_EVENTS_ENABLED,
+                "users": len(self._subscriptions),
+                "streams": sum(len(subscriptions) for subscriptions in self._subscriptions.values()),
+                "published": self.published
+            }
+
+broker = EventBroker()
+
+PENDING_EVENTS = "live_events"
+
+def publish_after_commit(db: Session, event_type: str, data: Dict[str, Any], user_id: Optional[int] = None):
+    """Queue an event on the session; it is published when the transaction commits"""
+    if LIVE_EVENTS_ENABLED:
+        db.info.setdefault(PENDING_EVENTS, []).append((event_type, data, user_id))
+
+@event.listens_for(SessionLocal, "after_commit")
+def _publish_pending(session: Session):
+    pending: List[Tuple[str, Dict[str, Any], Optional[int]]] = session.info.pop(PENDING_EVENTS, [])
+    for event_type, data, user_id in pending:
+        broker.publish(event_type, data, user_id)
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction):
+    # A savepoint rollback (e.g. a lost insert race) leaves the outer transaction's events queued
+    if not previous_transaction.nested:
+        session.info.pop(PENDING_EVENTS, None)
+
+def format_sse(message: Dict[str, Any]) -> str:
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'], default=str)}\n\n"
+
+async def event_stream(user_id: int, current_versions: Callable[[], Tuple[int, int]]) -> AsyncIterator[str]:
+    """
+    SSE body for one user: ready, then balance / payout / catalogue events as they happen
+    current_versions returns (ledger version, catalogue version) for the cross-worker check
+    """
+    subscription = broker.subscribe(user_id)
+    deadline = time.monotonic() + LIVE_EVENTS_MAX_STREAM_SECONDS
+    try:
+        versions = await run_in_threadpool(current_versions)
+        yield f"retry: {RECONNECT_MS}\n\n"
+        yield format_sse({"event": "ready", "data": {"ledger_version": versions[0], "catalogue_version": versions[1]}})
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), min(LIVE_EVENTS_HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                if time.monotonic() >= deadline:
+                    return
+                latest = await run_in_threadpool(current_versions)
+                if versions is not None and latest != versions:
+                    # Changed by another worker
+                    yield format_sse(RESYNC)
+                versions = latest
+                yield ": keep-alive\n\n"
+                continue
+
+            # Local change: re-baseline at the next heartbeat rather than resync for it
+            versions = None
+            yield format_sse(message)
+    finally:
+        broker.unsubscribe(subscription)
+
+def stream_versions(user_id: int) -> Tuple[int, int]:
+    """(ledger version, catalogue version) in a short session of its own, so streams hold no connection"""
+    from cache_versions import get_ledger_version, get_catalogue_version
+
+    with SessionLocal() as db:
+        return get_ledger_version(db, user_id), get_catalogue_version(db)
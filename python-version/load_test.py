@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+"""
+Load-testing harness
+Runs local stand-ins for the Lootably offers API and the PayPal payouts API,
+optionally starts the app against them, then drives a weighted mix of logins,
+offer listings, postbacks and payout requests from concurrent async clients.
+Reports throughput and p50/p95/p99 latency per endpoint.
+
+Usage:
+    python load_test.py --start-app --duration 30 --concurrency 50
+    python load_test.py --base-url http://localhost:8001 --mix offers=8,postback=2
+    python load_test.py --mocks-only    # run the stand-ins and print the env for the app
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import hashlib
+import argparse
+import tempfile
+import threading
+import subprocess
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+import uvicorn
+from fastapi import FastAPI, Request
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_MIX = "login=1,offers=6,postback=3,payout=1"
+SCENARIOS = ("login", "offers", "postback", "payout")
+
+# Credentials the app is started with when --start-app is used
+LOOTABLY_API_KEY = "load-test-key"
+LOOTABLY_PLACEMENT_ID = "load-test-placement"
+LOOTABLY_POSTBACK_SECRET = "load-test-secret"
+PAYPAL_CLIENT_ID = "load-test-client"
+PAYPAL_CLIENT_SECRET = "load-test-secret"
+
+POSTBACK_REVENUE = "2.50"
+POSTBACK_REWARD = "2.50"
+
+# Mock upstreams
+
+class UpstreamCounters:
+    """Calls received by the stand-ins, reported with the results"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = defaultdict(int)
+
+    def hit(self, name: str):
+        with self._lock:
+            self.calls[name] += 1
+
+upstream_counters = UpstreamCounters()
+
+def mock_offer(index: int) -> Dict[str, Any]:
+    """One catalogue entry in Lootably's v2 format"""
+    return {
+        "offerID": f"LOAD_OFFER_{index:04d}",
+        "name": f"Load Test Offer {index}",
+        "description": "Generated by load_test.py",
+        "type": "singlestep",
+        "revenue": POSTBACK_REVENUE,
+        "currencyReward": POSTBACK_REWARD,
+        "categories": [random.Random(index).choice(["survey", "game", "app", "signup"])],
+        "countries": ["US"],
+        "devices": ["desktop", "android", "ios"],
+        "link": f"https://example.com/offers/{index}",
+        "image": "",
+        "conversionRate": 0.1
+    }
+
+def create_mock_lootably(offer_count: int, latency_ms: float) -> FastAPI:
+    """Stand-in for the Lootably catalogue and user-offers API"""
+    app = FastAPI(title="Mock Lootably")
+    catalogue = [mock_offer(index) for index in range(offer_count)]
+
+    @app.post("/api/v2/offers/get")
+    async def get_offers(request: Request):
+        payload = await request.json()
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if payload.get("apiKey") != LOOTABLY_API_KEY:
+            upstream_counters.hit("lootably.rejected")
+            return {"success": False, "message": "Invalid API key"}
+
+        if "userData" in payload:
+            upstream_counters.hit("lootably.user_offers")
+            offers = random.Random(payload["userData"].get("userID")).sample(catalogue, min(10, len(catalogue)))
+        else:
+            upstream_counters.hit("lootably.catalogue")
+            offers = catalogue
+        return {"success": True, "data": {"offers": offers}}
+
+    return app
+
+def _mock_payout_batch(batch_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+    items = [{
+        "payout_item_id": f"ITEM{uuid.uuid4().hex[:12].upper()}",
+        "payout_batch_id": batch_id,
+        "transaction_status": "SUCCESS",
+        "payout_item": item
+    } for item in body.get("items", [])]
+    return {
+        "batch_header": {
+            "payout_batch_id": batch_id,
+            "batch_status": "SUCCESS",
+            "time_created": now,
+            "time_completed": now,
+            "sender_batch_header": body.get("sender_batch_header", {})
+        },
+        "items": items,
+        "links": []
+    }
+
+def create_mock_paypal(latency_ms: float) -> FastAPI:
+    """Stand-in for the PayPal OAuth and Payouts REST API"""
+    app = FastAPI(title="Mock PayPal")
+    batches: Dict[str, Dict[str, Any]] = {}
+
+    @app.post("/v1/oauth2/token")
+    async def token():
+        upstream_counters.hit("paypal.token")
+        return {
+            "scope": "https://uri.paypal.com/services/payouts",
+            "access_token": f"A21-{uuid.uuid4().hex}",
+            "token_type": "Bearer",
+            "app_id": "APP-LOADTEST",
+            "expires_in": 32400
+        }
+
+    @app.post("/v1/payments/payouts", status_code=201)
+    async def create_payout(request: Request):
+        body = await request.json()
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        upstream_counters.hit("paypal.create_payout")
+        batch_id = f"BATCH{uuid.uuid4().hex[:13].upper()}"
+        batches[batch_id] = _mock_payout_batch(batch_id, body)
+        return batches[batch_id]
+
+    @app.get("/v1/payments/payouts/{batch_id}")
+    async def get_payout(batch_id: str):
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        upstream_counters.hit("paypal.get_payout")
+        return batches.get(batch_id) or _mock_payout_batch(batch_id, {})
+
+    return app
+
+def start_server(app: FastAPI, port: int) -> uvicorn.Server:
+    """Run an app in a daemon thread with its own event loop"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.time() + 10
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError(f"Mock server on port {port} did not start")
+        time.sleep(0.05)
+    return server
+
+def app_environment(lootably_port: int, paypal_port: int) -> Dict[str, str]:
+    """Environment pointing the app at the stand-ins"""
+    return {
+        "LOOTABLY_API_URL": f"http://127.0.0.1:{lootably_port}/api/v2/offers/get",
+        "LOOTABLY_API_KEY": LOOTABLY_API_KEY,
+        "LOOTABLY_PLACEMENT_ID": LOOTABLY_PLACEMENT_ID,
+        "LOOTABLY_POSTBACK_SECRET": LOOTABLY_POSTBACK_SECRET,
+        "PAYPAL_CLIENT_ID": PAYPAL_CLIENT_ID,
+        "PAYPAL_CLIENT_SECRET": PAYPAL_CLIENT_SECRET,
+        "PAYPAL_API_BASE": f"http://127.0.0.1:{paypal_port}",
+        "SYNC_SCHEDULER_ENABLED": "false"
+    }
+
+def start_app(port: int, env: Dict[str, str], database_url: Optional[str]) -> subprocess.Popen:
+    """Start the app under uvicorn as a subprocess"""
+    if not database_url:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='offerwall-load-'), 'load.db')}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=APP_DIR,
+        env={**os.environ, **env, "DATABASE_URL": database_url}
+    )
+    print(f"🚀 Started app (pid {process.pid}) on port {port} with {database_url}")
+    return process
+
+# Async client
+
+class AsyncHTTPClient:
+    """Minimal keep-alive HTTP/1.1 client on asyncio streams - one connection per virtual user"""
+
+    def __init__(self, base_url: str):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, json_body: Any = None,
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes]:
+        # Retry once if the server closed an idle keep-alive connection
+        for attempt in range(2):
+            try:
+                return await self._request(method, path, json_body, headers)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if attempt:
+                    raise
+
+    async def _request(self, method, path, json_body, headers) -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        body = json.dumps(json_body).encode() if json_body is not None else b""
+        lines = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Accept-Encoding: identity",
+            f"Content-Length: {len(body)}"
+        ]
+        if json_body is not None:
+            lines.append("Content-Type: application/json")
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed")
+        status = int(status_line.split()[1])
+
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if "content-length" in response_headers:
+            content = await self.reader.readexactly(int(response_headers["content-length"]))
+        elif response_headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            content = b"".join(chunks)
+        else:
+            content = await self.reader.read()
+            await self.close()
+
+        if response_headers.get("connection") == "close":
+            await self.close()
+        return status, content
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            self.reader = None
+
+# Workload
+
+class Results:
+    """Latencies, failures and business rejections per scenario"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.failures: Dict[str, int] = defaultdict(int)
+        self.rejections: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, scenario: str, seconds: float, status: int, outcome: str):
+        self.latencies[scenario].append(seconds)
+        self.statuses[scenario][status] += 1
+        if outcome == "failed":
+            self.failures[scenario] += 1
+        elif outcome == "rejected":
+            self.rejections[scenario] += 1
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(percent / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}' - choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+def sign_postback(user_id: str, ip: str, revenue: str, reward: str) -> str:
+    """Postback hash the way Lootably computes it"""
+    return hashlib.sha256(f"{user_id}{ip}{revenue}{reward}{LOOTABLY_POSTBACK_SECRET}".encode()).hexdigest()
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.run_id = uuid.uuid4().hex[:8]
+        self.users: List[Dict[str, Any]] = []
+        self.results = Results()
+        self.postback_sequence = 0
+
+    def postback_path(self, user: Dict[str, Any]) -> str:
+        self.postback_sequence += 1
+        user_id = str(user["id"])
+        ip = f"10.0.{self.postback_sequence % 250}.{user['id'] % 250}"
+        params = {
+            "userID": user_id,
+            "transactionID": f"LOAD_{self.run_id}_{self.postback_sequence}",
+            "offerID": f"LOAD_OFFER_{random.randrange(self.args.offers):04d}",
+            "offerName": "Load Test Offer",
+            "revenue": POSTBACK_REVENUE,
+            "currencyReward": POSTBACK_REWARD,
+            "status": "1",
+            "ip": ip,
+            "hash": sign_postback(user_id, ip, POSTBACK_REVENUE, POSTBACK_REWARD)
+        }
+        return "/api/callback/lootably?" + urlencode(params)
+
+    async def setup(self):
+        """Register users, sync the mock catalogue and pre-fund balances"""
+        client = AsyncHTTPClient(self.args.base_url)
+        try:
+            for index in range(self.args.users):
+                username = f"load_{self.run_id}_{index}"
+                user = {
+                    "username": username,
+                    "email": f"{username}@example.com",
+                    "password": "load-test-password"
+                }
+                status, body = await client.request("POST", "/api/auth/register", {
+                    **user, "paypal_email": f"{username}@paypal.example.com"
+                })
+                if status != 200:
+                    raise SystemExit(f"❌ Registration failed ({status}): {body[:200]!r}")
+                data = json.loads(body)
+                user.update(id=data["user"]["id"], token=data["access_token"])
+                self.users.append(user)
+            print(f"👥 Registered {len(self.users)} users")
+
+            status, body = await client.request("POST", "/api/admin/sync-lootably-offers")
+            job_id = json.loads(body).get("job_id")
+            for _ in range(300):
+                status, body = await client.request("GET", f"/api/admin/jobs/{job_id}")
+                job = json.loads(body)
+                if job.get("status") in ("completed", "failed", "skipped"):
+                    break
+                await asyncio.sleep(0.2)
+            print(f"🔄 Offer sync {job.get('status')}: {job.get('result') or job.get('error')}")
+
+            for user in self.users:
+                for _ in range(self.args.prefund_postbacks):
+                    await client.request("GET", self.postback_path(user))
+            print(f"💰 Pre-funded users with {self.args.prefund_postbacks} postbacks each")
+        finally:
+            await client.close()
+
+    async def run_scenario(self, client: AsyncHTTPClient, scenario: str):
+        user = random.choice(self.users)
+        auth = {"Authorization": f"Bearer {user['token']}"}
+        started = time.perf_counter()
+
+        if scenario == "login":
+            status, body = await client.request("POST", "/api/auth/login",
+                                                {"email": user["email"], "password": user["password"]})
+        elif scenario == "offers":
+            status, body = await client.request("GET", "/api/offers")
+        elif scenario == "postback":
+            status, body = await client.request("GET", self.postback_path(user))
+            if status == 200 and b"ERROR" in body:
+                status = 422  # Lootably-style error body on a 200
+        else:
+            status, body = await client.request("POST", "/api/payouts/request",
+                                                {"amount": self.args.payout_amount}, auth)
+
+        elapsed = time.perf_counter() - started
+        if status == 200:
+            outcome = "ok"
+        elif scenario == "payout" and status == 400:
+            # Low balance / payout already in flight - business rules, not server failures
+            outcome = "rejected"
+        else:
+            outcome = "failed"
+        self.results.record(scenario, elapsed, status, outcome)
+
+    async def worker(self, weights: Dict[str, float], deadline: float, budget: List[int]):
+        client = AsyncHTTPClient(self.args.base_url)
+        names, values = list(weights), list(weights.values())
+        try:
+            while time.perf_counter() < deadline:
+                if budget[0] <= 0:
+                    break
+                budget[0] -= 1
+                scenario = random.choices(names, values)[0]
+                try:
+                    await self.run_scenario(client, scenario)
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    self.results.record(scenario, 0.0, 0, "failed")
+                    await client.close()
+        finally:
+            await client.close()
+
+    async def run(self) -> float:
+        await self.setup()
+        weights = parse_mix(self.args.mix)
+        budget = [self.args.requests or sys.maxsize]
+        print(f"🏃 {self.args.concurrency} clients, mix {self.args.mix}, "
+              f"{'%d requests' % self.args.requests if self.args.requests else '%ss' % self.args.duration}")
+
+        started = time.perf_counter()
+        deadline = started + (self.args.duration if not self.args.requests else 10 ** 9)
+        await asyncio.gather(*(self.worker(weights, deadline, budget) for _ in range(self.args.concurrency)))
+        return time.perf_counter() - started
+
+def summarize(results: Results, elapsed: float) -> Dict[str, Any]:
+    summary = {"elapsed_seconds": round(elapsed, 3), "endpoints": {}, "upstream_calls": dict(upstream_counters.calls)}
+    all_latencies = []
+    for scenario in SCENARIOS:
+        latencies = sorted(results.latencies.get(scenario, []))
+        if not latencies:
+            continue
+        all_latencies.extend(latencies)
+        summary["endpoints"][scenario] = {
+            "requests": len(latencies),
+            "failures": results.failures.get(scenario, 0),
+            "rejected": results.rejections.get(scenario, 0),
+            "throughput_rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+            "statuses": {str(code): count for code, count in sorted(results.statuses[scenario].items())}
+        }
+    all_latencies.sort()
+    summary["total"] = {
+        "requests": len(all_latencies),
+        "failures": sum(results.failures.values()),
+        "rejected": sum(results.rejections.values()),
+        "throughput_rps": round(len(all_latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(all_latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(all_latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(all_latencies, 99) * 1000, 2)
+    }
+    return summary
+
+def print_summary(summary: Dict[str, Any]):
+    print(f"\n📊 Results over {summary['elapsed_seconds']}s")
+    header = f"{'endpoint':<10} {'requests':>9} {'failed':>7} {'rejected':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    print(header)
+    print("-" * len(header))
+    for scenario, stats in summary["endpoints"].items():
+        print(f"{scenario:<10} {stats['requests']:>9} {stats['failures']:>7} {stats['rejected']:>9} {stats['throughput_rps']:>8} "
+              f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8} {stats['max_ms']:>8}")
+    total = summary["total"]
+    print("-" * len(header))
+    print(f"{'total':<10} {total['requests']:>9} {total['failures']:>7} {total['rejected']:>9} {total['throughput_rps']:>8} "
+          f"{total['p50_ms']:>8} {total['p95_ms']:>8} {total['p99_ms']:>8}")
+    if summary["upstream_calls"]:
+        calls = ", ".join(f"{name}={count}" for name, count in sorted(summary["upstream_calls"].items()))
+        print(f"\n🔌 Upstream calls: {calls}")
+
+def wait_for_app(base_url: str, timeout: float = 30.0):
+    """Poll until the app answers"""
+    import requests
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(base_url + "/api/offers", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise SystemExit(f"❌ App not reachable at {base_url}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the offerwall API against local Lootably / PayPal stand-ins")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8001", help="App under test")
+    parser.add_argument("--start-app", action="store_true", help="Start the app against the stand-ins on a fresh SQLite DB")
+    parser.add_argument("--database-url", help="DATABASE_URL for --start-app (default: temporary SQLite file)")
+    parser.add_argument("--mocks-only", action="store_true", help="Only run the stand-ins and print the app environment")
+    parser.add_argument("--lootably-port", type=int, default=8901)
+    parser.add_argument("--paypal-port", type=int, default=8902)
+    parser.add_argument("--upstream-latency-ms", type=float, default=0.0, help="Artificial latency added by the stand-ins")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent virtual clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests instead of --duration")
+    parser.add_argument("--users", type=int, default=20, help="Users registered during setup")
+    parser.add_argument("--offers", type=int, default=100, help="Offers in the mock Lootably catalogue")
+    parser.add_argument("--prefund-postbacks", type=int, default=4, help="Postbacks per user before the run")
+    parser.add_argument("--payout-amount", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, help="Random seed for a repeatable request sequence")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    start_server(create_mock_lootably(args.offers, args.upstream_latency_ms), args.lootably_port)
+    start_server(create_mock_paypal(args.upstream_latency_ms), args.paypal_port)
+    env = app_environment(args.lootably_port, args.paypal_port)
+    print(f"🧪 Mock Lootably on :{args.lootably_port}, mock PayPal on :{args.paypal_port}")
+
+    if args.mocks_only:
+        print("Start the app with:")
+        for name, value in env.items():
+            print(f"  export {name}={value}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            return
+
+    app_process = None
+    if args.start_app:
+        port = urlsplit(args.base_url).port or 8001
+        app_process = start_app(port, env, args.database_url)
+
+    try:
+        wait_for_app(args.base_url)
+        load_test = LoadTest(args)
+        elapsed = asyncio.run(load_test.run())
+        summary = summarize(load_test.results, elapsed)
+        print_summary(summary)
+        if args.json_path:
+            with open(args.json_path, "w") as output:
+                json.dump(summary, output, indent=2)
+            print(f"📝 Wrote {args.json_path}")
+    finally:
+        if app_process:
+            app_process.terminate()
+            app_process.wait(timeout=10)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Logging pipeline
+Request threads only put records on an in-memory queue; a QueueListener thread
+formats and writes them, so slow stderr / disk / log shippers never stall a
+request. LOG_FORMAT=json emits one JSON object per line including any `extra`
+fields (sync summaries use these). High-volume events such as postbacks log
+through a sampled logger.
+"""
+
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Tuple
+import config  # noqa: F401 - loads .env
+
+# Logging Configuration
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # 'text' or 'json'
+# Share of routine postback log lines kept; errors are always logged
+POSTBACK_LOG_SAMPLE_RATE = float(os.getenv("POSTBACK_LOG_SAMPLE_RATE", "0.1"))
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# Attributes every LogRecord has; anything else came from extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+# (logger, handlers it had before, listener) for each queued logger
+_queued: List[Tuple[logging.Logger, List[logging.Handler], QueueListener]] = []
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and any extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class _RecordQueueHandler(QueueHandler):
+    """
+    Queues the record untouched, so the listener's handlers (e.g. uvicorn's access
+    formatter) still see the original args; only use for loggers whose args are plain values
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class SamplingFilter(logging.Filter):
+    """Keeps a random share of records below ERROR and tags them with the rate, for re-weighting"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        if self.rate < 1 and random.random() >= self.rate:
+            return False
+        record.sample_rate = self.rate
+        return True
+
+def _route_through_queue(logger: logging.Logger, handler_class=QueueHandler):
+    """Move a logger's handlers behind a queue drained by a listener thread"""
+    handlers = logger.handlers
+    if not handlers or any(isinstance(handler, QueueHandler) for handler in handlers):
+        return
+    record_queue = queue.SimpleQueue()
+    listener = QueueListener(record_queue, *handlers, respect_handler_level=True)
+    logger.handlers = [handler_class(record_queue)]
+    listener.start()
+    _queued.append((logger, handlers, listener))
+
+def configure_logging():
+    """Set up the queued pipeline (idempotent); call once the server has configured its own loggers"""
+    root = logging.getLogger()
+    if not root.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JSONFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+        root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    _route_through_queue(root)
+
+    # uvicorn's own loggers don't propagate to the root (one access line per request)
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        _route_through_queue(logging.getLogger(name), _RecordQueueHandler)
+
+def stop_logging():
+    """Flush queued records, stop the listener threads and give loggers their handlers back"""
+    while _queued:
+        logger, handlers, listener = _queued.pop()
+        listener.stop()
+        logger.handlers = handlers
+
+atexit.register(stop_logging)
+
+def sampled_logger(name: str, rate: float) -> logging.Logger:
+    """Logger that keeps `rate` of its records below ERROR"""
+    logger = logging.getLogger(name)
+    if not any(isinstance(existing, SamplingFilter) for existing in logger.filters):
+        logger.addFilter(SamplingFilter(rate))
+    return logger
@@ -3,27 +3,30 @@ Lootably Offerwall API Integration
 """
 
 import os
+import time
 import hashlib
-import requests
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable
 from dataclasses import dataclass
 from sqlalchemy.orm import Session
 from database import Offer, User, OfferCallback
 from offer_utils import create_offer_from_external
-from dotenv import load_dotenv
-
-load_dotenv()
+from cache_versions import bump_catalogue_version
+from metrics import observe_upstream, postback_outcomes
+from logging_setup import sampled_logger, POSTBACK_LOG_SAMPLE_RATE
+import config  # noqa: F401 - loads .env
 
 # Lootably API Configuration
-LOOTABLY_API_URL = "https://api.lootably.com/api/v2/offers/get"
+# Overridable so load tests can point at a local stand-in (see load_test.py)
+LOOTABLY_API_URL = os.getenv("LOOTABLY_API_URL", "https://api.lootably.com/api/v2/offers/get")
 LOOTABLY_PLACEMENT_ID = os.getenv("LOOTABLY_PLACEMENT_ID", "")
 LOOTABLY_API_KEY = os.getenv("LOOTABLY_API_KEY", "")
 LOOTABLY_POSTBACK_SECRET = os.getenv("LOOTABLY_POSTBACK_SECRET", "")
 
 # Logging setup
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# Per-postback lines are sampled; errors are always logged
+postback_logger = sampled_logger(__name__ + ".postbacks", POSTBACK_LOG_SAMPLE_RATE)
 
 @dataclass
 class LootablyOffer:
@@ -41,6 +44,8 @@ class LootablyOffer:
     type: str  # "singlestep" or "multistep"
     conversion_rate: float
 
+_credentials_warned = False
+
 class LootablyAPI:
     """Handle Lootably API interactions"""
     
@@ -49,8 +54,11 @@ class LootablyAPI:
         self.api_key = LOOTABLY_API_KEY
         self.postback_secret = LOOTABLY_POSTBACK_SECRET
         
-        if not all([self.placement_id, self.api_key]):
+        global _credentials_warned
+        if not all([self.placement_id, self.api_key]) and not _credentials_warned:
+            # Once per process: an API object is created for every postback
             logger.warning("Lootably credentials not configured. Integration disabled.")
+            _credentials_warned = True
     
     def fetch_catalogue_offers(self, 
                               categories: Optional[List[str]] = None,
@@ -77,14 +85,19 @@ class LootablyAPI:
         if devices:
             payload["devices"] = devices
         
+        # Imported on first use: requests is only needed by the sync job, not the postback path
+        import requests
+        
         try:
-            response = requests.post(LOOTABLY_API_URL, json=payload, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
+            with observe_upstream("lootably", "catalogue") as call:
+                response = requests.post(LOOTABLY_API_URL, json=payload, timeout=30)
+                response.raise_for_status()
+                
+                data = response.json()
+                call.failed = not data.get("success")
             
             if not data.get("success"):
-                logger.error(f"Lootably API error: {data.get('message', 'Unknown error')}")
+                logger.error("Lootably API error: %s", data.get("message", "Unknown error"))
                 return []
             
             offers = []
@@ -94,17 +107,17 @@ class LootablyAPI:
                     lootably_offer = self._parse_offer_data(offer_data)
                     offers.append(lootably_offer)
                 except Exception as e:
-                    logger.error(f"Error parsing offer {offer_data.get('offerID', 'unknown')}: {e}")
+                    logger.error("Error parsing offer %s: %s", offer_data.get("offerID", "unknown"), e)
                     continue
             
-            logger.info(f"Fetched {len(offers)} offers from Lootably")
+            logger.info("Fetched %d offers from Lootably", len(offers))
             return offers
             
         except requests.RequestException as e:
-            logger.error(f"Error fetching offers from Lootably: {e}")
+            logger.error("Error fetching offers from Lootably: %s", e)
             return []
         except Exception as e:
-            logger.error(f"Unexpected error: {e}")
+            logger.error("Unexpected error: %s", e)
             return []
     
     def _parse_offer_data(self, offer_data: Dict[str, Any]) -> LootablyOffer:
@@ -153,14 +166,18 @@ class LootablyAPI:
             }
         }
         
+        import requests
+        
         try:
-            response = requests.post(LOOTABLY_API_URL, json=payload, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
+            with observe_upstream("lootably", "user_offers") as call:
+                response = requests.post(LOOTABLY_API_URL, json=payload, timeout=30)
+                response.raise_for_status()
+                
+                data = response.json()
+                call.failed = not data.get("success")
             
             if not data.get("success"):
-                logger.error(f"Lootably API error: {data.get('message', 'Unknown error')}")
+                logger.error("Lootably API error: %s", data.get("message", "Unknown error"))
                 return []
             
             offers = []
@@ -169,14 +186,14 @@ class LootablyAPI:
                     lootably_offer = self._parse_offer_data(offer_data)
                     offers.append(lootably_offer)
                 except Exception as e:
-                    logger.error(f"Error parsing user offer {offer_data.get('offerID', 'unknown')}: {e}")
+                    logger.error("Error parsing user offer %s: %s", offer_data.get("offerID", "unknown"), e)
                     continue
             
-            logger.info(f"Fetched {len(offers)} personalized offers for user {user_id}")
+            logger.info("Fetched %d personalized offers for user %s", len(offers), user_id)
             return offers
             
         except requests.RequestException as e:
-            logger.error(f"Error fetching user offers from Lootably: {e}")
+            logger.error("Error fetching user offers from Lootably: %s", e)
             return []
     
     def validate_postback(self, user_id: str, ip: str, revenue: str, 
@@ -185,12 +202,12 @@ class LootablyAPI:
         Validate that a postback request came from Lootably
         """
         if not self.postback_secret or self.postback_secret == "your_postback_secret_here":
-            logger.warning("Postback secret not configured - allowing for demo/development")
+            postback_logger.warning("Postback secret not configured - allowing for demo/development")
             return True  # Allow for development without secret
         
         # Skip validation if no hash provided (demo mode)
         if not received_hash:
-            logger.info("No hash provided - demo mode")
+            postback_logger.info("No hash provided - demo mode")
             return True
         
         # Concatenate values for hashing
@@ -206,14 +223,41 @@ def sync_lootably_offers_to_database(db: Session) -> int:
     Sync offers from Lootably to our database
     Returns number of offers synchronized
     """
+    return sync_lootably_offers(db)["synced"]
+
+# Report sync progress every N offers
+SYNC_PROGRESS_EVERY = 50
+# Offers whose sync errors are logged one by one; the rest are only counted
+SYNC_ERROR_LOG_LIMIT = 10
+
+def sync_lootably_offers(db: Session,
+                         progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, int]:
+    """
+    Sync offers from Lootably to our database
+    Lootably offers missing from the catalogue are deactivated
+    Returns row counts for the run (fetched, created, updated, deactivated, failed, synced)
+    """
+    started = time.perf_counter()
     api = LootablyAPI()
     
     # Fetch all offers from Lootably
     lootably_offers = api.fetch_catalogue_offers()
     
+    counts = {
+        "fetched": len(lootably_offers),
+        "created": 0,
+        "updated": 0,
+        "deactivated": 0,
+        "failed": 0,
+        "synced": 0
+    }
+    
+    if progress:
+        progress(counts)
+    
     if not lootably_offers:
         logger.warning("No offers received from Lootably")
-        return 0
+        return counts
     
     synced_count = 0
     
@@ -232,7 +276,7 @@ def sync_lootably_offers_to_database(db: Session) -> int:
                 existing_offer.reward_amount = lootably_offer.revenue
                 existing_offer.user_payout = lootably_offer.currency_reward
                 existing_offer.is_active = True
-                logger.info(f"Updated existing offer: {lootably_offer.name}")
+                counts["updated"] += 1
             else:
                 # Create new offer using our utility function
                 create_offer_from_external(
@@ -252,17 +296,45 @@ def sync_lootably_offers_to_database(db: Session) -> int:
                         "type": lootably_offer.type
                     }
                 )
-                logger.info(f"Created new offer: {lootably_offer.name}")
+                counts["created"] += 1
             
             synced_count += 1
             
         except Exception as e:
-            logger.error(f"Error syncing offer {lootably_offer.offer_id}: {e}")
+            counts["failed"] += 1
+            # The first few failures are logged individually, the rest only in the summary
+            if counts["failed"] <= SYNC_ERROR_LOG_LIMIT:
+                logger.error("Error syncing offer %s: %s", lootably_offer.offer_id, e)
             continue
+        
+        if progress and synced_count % SYNC_PROGRESS_EVERY == 0:
+            progress(counts)
+    
+    # Deactivate offers that are no longer in the Lootably catalogue
+    current_ids = [lootably_offer.offer_id for lootably_offer in lootably_offers]
+    counts["deactivated"] = db.query(Offer).filter(
+        Offer.provider == "lootably",
+        Offer.is_active == True,
+        Offer.external_offer_id.notin_(current_ids)
+    ).update({Offer.is_active: False}, synchronize_session=False)
+    
+    # Invalidate cached offer listings (ETag)
+    if synced_count or counts["deactivated"]:
+        bump_catalogue_version(db)
     
     db.commit()
-    logger.info(f"Synchronized {synced_count} offers from Lootably")
-    return synced_count
+    counts["synced"] = synced_count
+    if progress:
+        progress(counts)
+    # One summary record per sync instead of a line per offer
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Lootably sync: %d fetched, %d created, %d updated, %d deactivated, %d failed in %.2fs",
+        counts["fetched"], counts["created"], counts["updated"], counts["deactivated"], counts["failed"],
+        elapsed,
+        extra={"event": "lootably_sync", "counts": counts, "seconds": round(elapsed, 3)}
+    )
+    return counts
 
 def process_lootably_postback(db: Session, postback_data: Dict[str, str]) -> Dict[str, Any]:
     """
@@ -283,19 +355,22 @@ def process_lootably_postback(db: Session, postback_data: Dict[str, str]) -> Dic
     
     # Validate postback
     if not api.validate_postback(user_id, ip_address, revenue, currency_reward, received_hash):
-        logger.error(f"Invalid postback hash for transaction {transaction_id}")
+        logger.error("Invalid postback hash for transaction %s", transaction_id)
+        postback_outcomes.inc("lootably", "invalid_signature")
         return {"success": False, "error": "Invalid postback signature"}
     
     # Check if this is a completed conversion
     if status != "1":
-        logger.warning(f"Received postback with non-completion status: {status}")
+        postback_logger.warning("Received postback with non-completion status: %s", status)
+        postback_outcomes.inc("lootably", "non_completion")
         return {"success": False, "error": "Non-completion status"}
     
     try:
         # Find the user in our database
         user = db.query(User).filter(User.id == int(user_id)).first()
         if not user:
-            logger.error(f"User {user_id} not found for postback")
+            logger.error("User %s not found for postback", user_id)
+            postback_outcomes.inc("lootably", "user_not_found")
             return {"success": False, "error": "User not found"}
         
         # Find the offer
@@ -305,7 +380,8 @@ def process_lootably_postback(db: Session, postback_data: Dict[str, str]) -> Dic
         ).first()
         
         if not offer:
-            logger.error(f"Offer {offer_id} not found for postback")
+            logger.error("Offer %s not found for postback", offer_id)
+            postback_outcomes.inc("lootably", "offer_not_found")
             return {"success": False, "error": "Offer not found"}
         
         # Record the callback
@@ -331,7 +407,8 @@ def process_lootably_postback(db: Session, postback_data: Dict[str, str]) -> Dic
         from offer_utils import complete_offer
         result = complete_offer(db, int(user_id), offer.id, {
             "lootably_transaction_id": transaction_id,
-            "lootably_revenue": float(revenue)
+            "lootably_revenue": float(revenue),
+            "provider_revenue": float(revenue)
         })
         
         # Mark callback as processed
@@ -341,7 +418,8 @@ def process_lootably_postback(db: Session, postback_data: Dict[str, str]) -> Dic
         
         db.commit()
         
-        logger.info(f"Successfully processed Lootably postback for user {user_id}, offer {offer_id}")
+        postback_logger.info("Processed Lootably postback for user %s, offer %s", user_id, offer_id)
+        postback_outcomes.inc("lootably", "success")
         
         return {
             "success": True,
@@ -352,5 +430,6 @@ def process_lootably_postback(db: Session, postback_data: Dict[str, str]) -> Dic
         
     except Exception as e:
         db.rollback()
-        logger.error(f"Error processing Lootably postback: {e}")
+        logger.error("Error processing Lootably postback: %s", e)
+        postback_outcomes.inc("lootably", "error")
         return {"success": False, "error": str(e)}
\ No newline at end of file
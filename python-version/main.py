@@ -2,16 +2,15 @@
 OfferEarner - Main Application
 """
 
+import logging
 from fastapi import FastAPI, Request, Depends, HTTPException, status, Form
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse, PlainTextResponse
 from sqlalchemy.orm import Session
-from datetime import timedelta
-import uvicorn
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
 
 # Import our modules
-from database import init_db, get_db, User, Offer, UserOffer, Earning, Payout
+from database import init_db, DB_AUTO_CREATE_SCHEMA, get_db, engine, User, Offer, UserOffer, Earning, Payout
 from auth import (
     authenticate_user, 
     create_user, 
@@ -21,51 +20,114 @@ from auth import (
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from models import *
-from offer_utils import complete_offer, get_platform_stats
-from lootably_integration import sync_lootably_offers_to_database, process_lootably_postback, LootablyAPI
-from demo_lootably import create_demo_lootably_offers
+from offer_utils import start_offer, complete_offer, get_platform_stats, get_active_offers
+from dashboard_summary import get_dashboard_summary
+from revenue_rollups import get_revenue_report
+from earnings_history import get_user_earnings_page, iter_earnings_csv, iter_earnings_ndjson
+from lootably_integration import process_lootably_postback, LootablyAPI
 from paypal_integration import (
     process_payout_request, 
     get_user_payout_history, 
+    get_user_payout,
     get_platform_payout_stats,
-    PayPalPayoutManager,
     MINIMUM_PAYOUT_AMOUNT
 )
+from sync_scheduler import start_sync_scheduler, stop_sync_scheduler, get_sync_scheduler_status
+from fast_json import DefaultJSONResponse, model_response, model_list_response
+from static_assets import PrecompressedStaticFiles, STATIC_DIR, asset_url
+from compression import CompressionMiddleware, compression_stats
+from metrics import METRICS_ENABLED, MetricsMiddleware, render_metrics
+from sql_stats import SQLStatsMiddleware, instrument_engine, query_stats
+from server_timing import ServerTimingMiddleware, TimedJinja2Templates
+from cache_versions import (
+    get_catalogue_version,
+    get_ledger_version,
+    make_etag,
+    etag_matches,
+    not_modified,
+    with_etag
+)
+from sync_jobs import (
+    submit_lootably_sync_job, submit_demo_offers_job, get_job_status, shutdown_job_pool, fail_orphaned_jobs
+)
+from warmup import APP_WARMUP, warm_up
+from logging_setup import configure_logging, stop_logging
+from page_cache import page_cache, render_page, template_env_options
+from live_events import LIVE_EVENTS_ENABLED, broker, event_stream, stream_versions
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background services with the app"""
+    # Log records are written by a listener thread (after uvicorn has set up its loggers)
+    configure_logging()
+    # Schema setup runs here rather than at import, so importing main stays free of database I/O
+    if DB_AUTO_CREATE_SCHEMA:
+        init_db()
+    # Jobs left queued / running by a worker that was killed
+    fail_orphaned_jobs()
+    # Before the worker accepts traffic (APP_WARMUP=false to skip)
+    if APP_WARMUP:
+        warm_up(templates)
+    # Periodic Lootably sync (only when SYNC_SCHEDULER_ENABLED=true)
+    start_sync_scheduler()
+    yield
+    stop_sync_scheduler()
+    shutdown_job_pool()
+    stop_logging()
 
 app = FastAPI(
     title="OfferEarner", 
     version="1.0.0",
     # Handle HTTPS behind proxy
-    root_path=""
+    root_path="",
+    lifespan=lifespan,
+    default_response_class=DefaultJSONResponse
 )
 
-# Initialize database
-init_db()
+# Per-request SQL counts, slow-query log and top-N statements (see /api/admin/sql-stats)
+instrument_engine(engine)
+app.add_middleware(SQLStatsMiddleware)
+
+# Compress large JSON / HTML / streamed export responses
+app.add_middleware(CompressionMiddleware)
+
+# Server-Timing header: auth / db / upstream / serialization / template phases
+app.add_middleware(ServerTimingMiddleware)
+
+# Prometheus metrics (opt-in) - outermost so latency includes compression
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint():
+        """Prometheus scrape endpoint"""
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 # Mount static files (CSS, JS, images)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Serves .br / .gz variants and immutable caching for fingerprinted files (see build_assets.py)
+app.mount("/static", PrecompressedStaticFiles(directory=STATIC_DIR), name="static")
 
-# Templates
-templates = Jinja2Templates(directory="templates")
+# Templates (bytecode cache; no per-render mtime checks in production)
+templates = TimedJinja2Templates(directory="templates", **template_env_options())
+templates.env.globals["asset_url"] = asset_url
 
 # Web Routes (Templates)
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request, current_user: User = Depends(get_current_user_optional)):
     """Homepage"""
-    return templates.TemplateResponse("index.html", {
-        "request": request,
-        "current_user": current_user
-    })
+    return render_page(templates, request, "index.html", current_user=current_user)
 
 @app.get("/register", response_class=HTMLResponse)
 async def register_page(request: Request):
     """User registration page"""
-    return templates.TemplateResponse("register.html", {"request": request})
+    return render_page(templates, request, "register.html")
 
 @app.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
     """User login page"""
-    return templates.TemplateResponse("login.html", {"request": request})
+    return render_page(templates, request, "login.html")
 
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard_page(request: Request, current_user: User = Depends(get_current_user)):
@@ -78,10 +140,7 @@ async def dashboard_page(request: Request, current_user: User = Depends(get_curr
 @app.get("/offers", response_class=HTMLResponse)
 async def offers_page(request: Request, current_user: User = Depends(get_current_user_optional)):
     """Available offers page"""
-    return templates.TemplateResponse("offers.html", {
-        "request": request,
-        "current_user": current_user
-    })
+    return render_page(templates, request, "offers.html", current_user=current_user)
 
 # Authentication API Routes
 @app.post("/api/auth/register", response_model=TokenResponse)
@@ -103,11 +162,11 @@ async def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
             data={"sub": str(db_user.id)}, expires_delta=access_token_expires
         )
         
-        return TokenResponse(
+        return model_response(TokenResponse(
             access_token=access_token,
             token_type="bearer",
             user=UserResponse.model_validate(db_user)
-        )
+        ))
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -132,66 +191,152 @@ async def login_user(user_data: UserLogin, db: Session = Depends(get_db)):
         data={"sub": str(user.id)}, expires_delta=access_token_expires
     )
     
-    return TokenResponse(
+    return model_response(TokenResponse(
         access_token=access_token,
         token_type="bearer",
         user=UserResponse.model_validate(user)
-    )
+    ))
 
 @app.get("/api/auth/me", response_model=UserResponse)
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information"""
-    return UserResponse.model_validate(current_user)
+    return model_response(UserResponse.model_validate(current_user))
 
 # Dashboard API Routes
 @app.get("/api/dashboard/stats", response_model=DashboardStats)
 async def get_dashboard_stats(
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get dashboard statistics"""
-    # Get recent earnings (last 10)
-    recent_earnings = db.query(Earning).filter(
-        Earning.user_id == current_user.id
-    ).order_by(Earning.created_at.desc()).limit(10).all()
+    # Unchanged since the client's copy - skip building the response
+    etag = make_etag("dash", current_user.id, get_ledger_version(db, current_user.id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
-    # Get recent offers (last 10)
-    recent_offers = db.query(UserOffer).filter(
-        UserOffer.user_id == current_user.id
-    ).order_by(UserOffer.created_at.desc()).limit(10).all()
+    # Pending count and recent activity are kept precomputed per user
+    summary = get_dashboard_summary(db, current_user.id)
     
-    # Count pending offers
-    pending_offers = db.query(UserOffer).filter(
-        UserOffer.user_id == current_user.id,
-        UserOffer.status.in_(["started", "in_progress"])
-    ).count()
-    
-    return DashboardStats(
+    return with_etag(model_response(DashboardStats(
         total_earnings=current_user.total_earned,
         completed_offers=current_user.tasks_completed,
-        pending_offers=pending_offers,
+        pending_offers=summary.pending_offers,
         account_balance=current_user.balance,
-        recent_earnings=[EarningResponse.model_validate(e) for e in recent_earnings],
-        recent_offers=[UserOfferResponse.model_validate(o) for o in recent_offers]
+        recent_earnings=summary.recent_earnings or [],
+        recent_offers=summary.recent_offers or []
+    )), etag, vary="Authorization")
+
+@app.get("/api/events")
+async def live_events_stream(current_user: Optional[User] = Depends(get_current_user_optional)):
+    """
+    Server-sent events: balance, payout and catalogue changes as they happen
+    The user is loaded in a short session, so an open stream holds no database connection.
+    """
+    if not LIVE_EVENTS_ENABLED:
+        raise HTTPException(status_code=404, detail="Live events are disabled")
+    if current_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    user_id = current_user.id
+    return StreamingResponse(
+        event_stream(user_id, lambda: stream_versions(user_id)),
+        media_type="text/event-stream",
+        # No proxy buffering or caching of the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Earnings API Routes
+@app.get("/api/earnings")
+async def get_earnings_history(
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get user's earnings history, newest first
+    Pass next_cursor back as cursor to get the following page
+    """
+    try:
+        page = get_user_earnings_page(db, current_user.id, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return {
+        "success": True,
+        "earnings": page["earnings"],
+        "next_cursor": page["next_cursor"]
+    }
+
+@app.get("/api/earnings/export")
+async def export_earnings(
+    format: str = "csv",
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export user's full earnings history as CSV or NDJSON
+    Rows are streamed, never loaded all at once
+    """
+    if format == "csv":
+        content, media_type = iter_earnings_csv(current_user.id), "text/csv"
+    elif format == "ndjson":
+        content, media_type = iter_earnings_ndjson(current_user.id), "application/x-ndjson"
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="format must be csv or ndjson"
+        )
+    
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="earnings.{format}"'}
     )
 
 # Offers API Routes
 @app.get("/api/offers", response_model=List[OfferResponse])
 async def get_available_offers(
+    request: Request,
     provider: Optional[str] = None,
     category: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """Get available offers"""
-    query = db.query(Offer).filter(Offer.is_active == True)
-    
-    if provider:
-        query = query.filter(Offer.provider == provider)
-    if category:
-        query = query.filter(Offer.category == category)
+    # Filters are part of the ETag since they change the body
+    etag = make_etag("offers", get_catalogue_version(db), provider or "", category or "")
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
-    offers = query.order_by(Offer.user_payout.desc()).all()
-    return [OfferResponse.model_validate(offer) for offer in offers]
+    offers = get_active_offers(db, provider, category)
+    # Validated and serialized once; response_model stays for the OpenAPI schema
+    return with_etag(model_list_response(OfferResponse, offers), etag)
+
+@app.post("/api/offers/{offer_id}/start")
+async def start_offer_endpoint(
+    offer_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Start an offer for the current user"""
+    try:
+        user_offer = start_offer(db, current_user.id, offer_id)
+        return {
+            "success": True,
+            "user_offer_id": user_offer.id,
+            "status": user_offer.status
+        }
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
 
 @app.post("/api/offers/{offer_id}/complete")
 async def complete_offer_endpoint(
@@ -231,46 +376,139 @@ async def get_platform_revenue_stats(db: Session = Depends(get_db)):
     """
     return get_platform_stats(db)
 
+@app.get("/api/admin/revenue")
+async def get_revenue_endpoint(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    provider: Optional[str] = None,
+    category: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get daily revenue buckets per provider and category - ADMIN ONLY
+    Defaults to the last 30 days; reads pre-aggregated rollups
+    Days rebuilt by `revenue_rollups.py backfill` use the offers' current prices for provider revenue
+    """
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=30)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end"
+        )
+    return get_revenue_report(db, start, end, provider, category)
+
 # Lootably Integration Endpoints
 
-@app.post("/api/admin/sync-lootably-offers")
-async def sync_lootably_offers_endpoint(db: Session = Depends(get_db)):
+@app.post("/api/admin/sync-lootably-offers", status_code=status.HTTP_202_ACCEPTED)
+async def sync_lootably_offers_endpoint():
     """
     Manually sync offers from Lootably (ADMIN ONLY)
-    In production, this would be called by a scheduled task every 10-20 minutes
+    The sync runs as a background job - poll /api/admin/jobs/{job_id} for progress
+    Periodic syncs run in-process when SYNC_SCHEDULER_ENABLED=true
     """
     try:
-        synced_count = sync_lootably_offers_to_database(db)
+        job = submit_lootably_sync_job()
         return {
             "success": True,
-            "message": f"Successfully synchronized {synced_count} offers from Lootably",
-            "synced_count": synced_count
+            "message": "Lootably sync already in progress" if job["already_running"] else "Lootably sync started",
+            "job_id": job["job_id"],
+            "status": job["status"]
         }
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to sync offers: {str(e)}"
+            detail=f"Failed to start offer sync: {str(e)}"
         )
 
-@app.post("/api/admin/create-demo-offers") 
-async def create_demo_offers_endpoint(db: Session = Depends(get_db)):
+@app.get("/api/admin/sync-scheduler")
+async def sync_scheduler_status_endpoint():
+    """
+    Get the in-process sync scheduler status (ADMIN ONLY)
+    Includes last run duration and row counts
+    """
+    return get_sync_scheduler_status()
+
+@app.get("/api/admin/compression-stats")
+async def compression_stats_endpoint():
+    """
+    Get response compression ratio and CPU time per route (ADMIN ONLY)
+    """
+    return compression_stats.snapshot()
+
+@app.get("/api/admin/sql-stats")
+async def sql_stats_endpoint(limit: int = 20, order_by: str = "total"):
+    """
+    Get the most expensive SQL statements by call site and statements per route (ADMIN ONLY)
+    order_by: total, count or max
+    """
+    return query_stats.top(limit=min(max(limit, 1), 200), order_by=order_by)
+
+@app.delete("/api/admin/sql-stats")
+async def reset_sql_stats_endpoint():
+    """
+    Reset SQL statistics, e.g. before profiling a single flow (ADMIN ONLY)
+    """
+    query_stats.reset()
+    return {"message": "SQL statistics reset"}
+
+@app.get("/api/admin/page-cache")
+async def page_cache_stats_endpoint():
+    """
+    Get anonymous page cache hit ratio and cached pages (ADMIN ONLY)
+    """
+    return page_cache.snapshot()
+
+@app.delete("/api/admin/page-cache")
+async def clear_page_cache_endpoint():
+    """
+    Flush the anonymous page cache of this worker (ADMIN ONLY)
+    """
+    page_cache.clear()
+    return {"message": "Page cache cleared"}
+
+@app.get("/api/admin/live-events")
+async def live_events_stats_endpoint():
+    """
+    Get open event streams and events published by this worker (ADMIN ONLY)
+    """
+    return broker.snapshot()
+
+@app.post("/api/admin/create-demo-offers", status_code=status.HTTP_202_ACCEPTED) 
+async def create_demo_offers_endpoint():
     """
     Create demo Lootably offers for testing (ADMIN ONLY)
     This simulates what real API integration would look like
+    Runs as a background job - poll /api/admin/jobs/{job_id} for progress
     """
     try:
-        created_count = create_demo_lootably_offers(db)
+        job = submit_demo_offers_job()
         return {
             "success": True,
-            "message": f"Successfully created {created_count} demo offers",
-            "created_count": created_count
+            "message": "Demo offer creation already in progress" if job["already_running"] else "Demo offer creation started",
+            "job_id": job["job_id"],
+            "status": job["status"]
         }
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to create demo offers: {str(e)}"
+            detail=f"Failed to start demo offer creation: {str(e)}"
         )
 
+@app.get("/api/admin/jobs/{job_id}")
+async def get_job_status_endpoint(job_id: str):
+    """
+    Get background job status and progress (ADMIN ONLY)
+    Progress reports fetched, upserted and deactivated rows plus elapsed seconds
+    """
+    job = get_job_status(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
 @app.get("/api/callback/lootably")
 async def lootably_postback_handler(
     request: Request,
@@ -295,8 +533,7 @@ async def lootably_postback_handler(
     
     except Exception as e:
         # Log error and return failure response
-        import logging
-        logging.error(f"Lootably postback processing failed: {e}")
+        logger.exception("Lootably postback processing failed: %s", e)
         return f"ERROR: {str(e)}"
 
 @app.get("/api/offers/lootably/user/{user_id}")
@@ -404,18 +641,27 @@ async def request_payout(
 
 @app.get("/api/payouts/history")
 async def get_payout_history(
+    cursor: Optional[str] = None,
+    limit: int = 20,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get user's payout history
+    Get user's payout history, newest first
+    Pass next_cursor back as cursor to get the following page
     """
     try:
-        history = get_user_payout_history(db, current_user.id)
+        history = get_user_payout_history(db, current_user.id, cursor=cursor, limit=limit)
         return {
             "success": True,
-            "payouts": history
+            "payouts": history["payouts"],
+            "next_cursor": history["next_cursor"]
         }
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -423,15 +669,43 @@ async def get_payout_history(
         )
 
 @app.get("/api/payouts/info")
-async def get_payout_info(current_user: User = Depends(get_current_user)):
+async def get_payout_info(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """
     Get payout information and limits
     """
-    return {
+    etag = make_etag("payout-info", current_user.id, get_ledger_version(db, current_user.id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    return with_etag(DefaultJSONResponse({
         "minimum_payout": MINIMUM_PAYOUT_AMOUNT,
         "available_balance": current_user.balance,
         "paypal_email": current_user.paypal_email,
         "can_payout": current_user.balance >= MINIMUM_PAYOUT_AMOUNT
+    }), etag, vary="Authorization")
+
+@app.get("/api/payouts/{payout_id}")
+async def get_payout_detail(
+    payout_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a single payout including its payment details
+    """
+    payout = get_user_payout(db, current_user.id, payout_id)
+    if not payout:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Payout not found"
+        )
+    return {
+        "success": True,
+        "payout": payout
     }
 
 @app.get("/api/admin/payouts/stats")
@@ -474,4 +748,6 @@ async def cpalead_callback(request: Request):
     return {"status": "received"}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8001, reload=True)
\ No newline at end of file
+    # Same launcher as start.py (reload needs an import string, so it can't be used from here)
+    import start
+    start.main()
\ No newline at end of file
@@ -9,6 +9,7 @@ import argparse
 from sqlalchemy.orm import sessionmaker
 from database import engine, Offer
 from lootably_integration import sync_lootably_offers_to_database, LootablyAPI
+from logging_setup import configure_logging
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -126,6 +127,7 @@ def main():
     ], help="Command to run")
     
     args = parser.parse_args()
+    configure_logging()
     
     if args.command == "test":
         test_connection()
@@ -0,0 +1,216 @@
+"""
+Prometheus metrics
+A small in-process registry rendered in the Prometheus text format at /metrics.
+Enabled with METRICS_ENABLED=true; updates are a dict lookup under a lock,
+cheap enough to leave on in production. SQL timings come from sql_stats.py.
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+import config  # noqa: F401 - loads .env
+from request_context import add_phase, request_scope, route_template
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in items]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            else:
+                state[len(self.buckets)] += 1
+            state[-1] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(state)) for labels, state in self._values.items()]
+        lines = []
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+registry: List[_Metric] = []
+
+# HTTP
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Request latency by route template",
+    ("method", "route", "status")
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "Requests currently being handled", ("method",)
+)
+
+# Database
+db_statements = Counter(
+    "db_statements_total", "SQL statements executed, by route template", ("route",)
+)
+db_statement_duration = Counter(
+    "db_statement_duration_seconds_total", "Time spent executing SQL, by route template", ("route",)
+)
+
+# Upstream services
+upstream_request_duration = Histogram(
+    "upstream_request_duration_seconds", "Latency of calls to Lootably / PayPal",
+    ("service", "operation")
+)
+upstream_errors = Counter(
+    "upstream_errors_total", "Failed calls to Lootably / PayPal", ("service", "operation")
+)
+
+# PayPal OAuth
+paypal_token_refreshes = Counter(
+    "paypal_token_refreshes_total", "PayPal access token fetches (reason: initial, expiry, unauthorized)",
+    ("reason", "outcome")
+)
+
+# Postbacks
+postback_outcomes = Counter(
+    "postback_outcomes_total", "Offerwall postbacks by outcome", ("provider", "outcome")
+)
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+class _UpstreamCall:
+    failed = False
+
+@contextmanager
+def observe_upstream(service: str, operation: str):
+    """
+    Time a call to an upstream service
+    Exceptions count as errors; set call.failed = True for error responses
+    """
+    call = _UpstreamCall()
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        call.failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        upstream_request_duration.observe(elapsed, service, operation)
+        add_phase("upstream", elapsed)
+        if call.failed:
+            upstream_errors.inc(service, operation)
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, in-flight requests and SQL work per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_holder = {"status": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        with request_scope(scope) as stats:
+            http_requests_in_flight.inc(method)
+            started = time.perf_counter()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                elapsed = time.perf_counter() - started
+                http_requests_in_flight.dec(method)
+                route = route_template(scope)
+                http_request_duration.observe(elapsed, method, route, str(status_holder["status"]))
+                if stats.sql_count:
+                    db_statements.inc(route, amount=stats.sql_count)
+                    db_statement_duration.inc(route, amount=stats.sql_seconds)
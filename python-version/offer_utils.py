@@ -2,9 +2,15 @@
 Utility functions for offer management and revenue calculation
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+from datetime import datetime
 from sqlalchemy.orm import Session
 from database import Offer, User, UserOffer, Earning
+from dashboard_summary import record_offer_started, record_offer_completed, PENDING_STATUSES
+from platform_counters import record_offer_completion, get_counters, OFFERS_COMPLETED, EARNINGS_TOTAL
+from revenue_rollups import record_completion_revenue
+from cache_versions import bump_ledger_version
+from live_events import publish_after_commit
 import json
 
 # Revenue split configuration
@@ -54,6 +60,52 @@ def create_offer_from_external(
     db.refresh(offer)
     return offer
 
+def get_active_offers(db: Session, provider: Optional[str] = None,
+                      category: Optional[str] = None) -> List[Offer]:
+    """Active offers, best paying first (the GET /api/offers listing)"""
+    query = db.query(Offer).filter(Offer.is_active == True)
+    
+    if provider:
+        query = query.filter(Offer.provider == provider)
+    if category:
+        query = query.filter(Offer.category == category)
+    
+    return query.order_by(Offer.user_payout.desc()).all()
+
+def start_offer(db: Session, user_id: int, offer_id: int) -> UserOffer:
+    """
+    Record that a user started an offer
+    Returns the existing record if the offer was already started
+    """
+    offer = db.query(Offer).filter(Offer.id == offer_id, Offer.is_active == True).first()
+    if not offer:
+        raise ValueError("Offer not found")
+    
+    user_offer = db.query(UserOffer).filter(
+        UserOffer.user_id == user_id,
+        UserOffer.offer_id == offer_id
+    ).first()
+    if user_offer:
+        return user_offer
+    
+    now = datetime.utcnow()
+    user_offer = UserOffer(
+        user_id=user_id,
+        offer_id=offer_id,
+        status="started",
+        reward_amount=offer.user_payout,
+        started_at=now,
+        created_at=now
+    )
+    db.add(user_offer)
+    db.flush()  # Get the ID
+    
+    record_offer_started(db, user_offer, offer)
+    bump_ledger_version(db, user_id)
+    
+    db.commit()
+    return user_offer
+
 def complete_offer(
     db: Session, 
     user_id: int, 
@@ -77,19 +129,25 @@ def complete_offer(
         UserOffer.offer_id == offer_id
     ).first()
     
-    if not user_offer:
+    now = datetime.utcnow()
+    is_new = user_offer is None
+    if is_new:
         user_offer = UserOffer(
             user_id=user_id,
             offer_id=offer_id,
             status="started",
-            reward_amount=offer.user_payout
+            reward_amount=offer.user_payout,
+            started_at=now,
+            created_at=now
         )
         db.add(user_offer)
+        db.flush()  # Get the ID for the earning record
+    was_pending = not is_new and user_offer.status in PENDING_STATUSES
+    newly_completed = user_offer.status != "completed"
     
     # Mark as completed
-    from datetime import datetime
     user_offer.status = "completed"
-    user_offer.completed_at = datetime.utcnow()
+    user_offer.completed_at = now
     
     # Create earning record
     earning = Earning(
@@ -97,14 +155,33 @@ def complete_offer(
         user_offer_id=user_offer.id,
         amount=offer.user_payout,
         type="task_completion",
-        description=f"Completed: {offer.title}"
+        description=f"Completed: {offer.title}",
+        created_at=now
     )
     db.add(earning)
+    db.flush()
+    
+    # Keep the dashboard summary, platform counters and revenue rollups in step, in the same transaction
+    record_offer_completed(db, user_offer, offer, earning, was_pending, is_new)
+    record_offer_completion(db, offer.user_payout, newly_completed)
+    
+    # Provider-reported revenue when the callback includes it
+    provider_revenue = (external_data or {}).get("provider_revenue", offer.reward_amount)
+    record_completion_revenue(db, now.date(), offer.provider, offer.category,
+                              offer.user_payout, provider_revenue)
     
     # Update user balance and stats
     user.balance += offer.user_payout
     user.total_earned += offer.user_payout
     user.tasks_completed += 1
+    bump_ledger_version(db, user_id)
+    publish_after_commit(db, "balance", {
+        "balance": user.balance,
+        "total_earned": user.total_earned,
+        "tasks_completed": user.tasks_completed,
+        "earned": offer.user_payout,
+        "offer_title": offer.title
+    }, user_id)
     
     db.commit()
     
@@ -122,12 +199,10 @@ def get_platform_stats(db: Session) -> Dict[str, float]:
     """
     # This would calculate total platform earnings
     # Users never see this information
-    total_offers_completed = db.query(UserOffer).filter(
-        UserOffer.status == "completed"
-    ).count()
-    
-    from sqlalchemy import func
-    total_user_payouts = db.query(func.sum(Earning.amount)).scalar() or 0.0
+    # Read from counters maintained by complete_offer (see platform_counters.py)
+    counters = get_counters(db)
+    total_offers_completed = int(counters.get(OFFERS_COMPLETED, 0))
+    total_user_payouts = counters.get(EARNINGS_TOTAL, 0.0)
     
     # Platform earnings = total user payouts (since we pay 50% to users)
     estimated_platform_revenue = total_user_payouts
@@ -0,0 +1,134 @@
+"""
+Rendered page cache
+The HTML pages render the same bytes for every anonymous visitor (offers and
+balances are fetched by the page's JavaScript), so the rendered body is kept
+per process, keyed on template, auth state and theme. Authenticated requests
+always render. Entries are tied to the asset manifest, so a deploy that
+rebuilds assets never serves a page pointing at old files; a restart starts empty.
+
+Also configures Jinja: compiled templates go to a bytecode cache, and in
+production templates aren't re-checked on disk for every render.
+"""
+
+import os
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import HTMLResponse, Response
+from jinja2 import FileSystemBytecodeCache
+from fastapi.templating import Jinja2Templates
+import config  # noqa: F401 - loads .env
+from static_assets import load_manifest
+
+PRODUCTION = os.getenv("SERVER_MODE", "development") == "production"
+
+# Page Cache Configuration (on by default in production only, so template edits show up in development)
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "true" if PRODUCTION else "false").lower() == "true"
+PAGE_CACHE_TTL_SECONDS = int(os.getenv("PAGE_CACHE_TTL_SECONDS", "300"))
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "64"))
+
+# Jinja Configuration
+TEMPLATE_AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD", "false" if PRODUCTION else "true").lower() == "true"
+JINJA_BYTECODE_CACHE_DIR = os.getenv(
+    "JINJA_BYTECODE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "offerearner-jinja")
+)
+
+# Theme is chosen client-side today; a theme cookie still gets its own entry
+THEME_COOKIE = "theme"
+DEFAULT_THEME = "light"
+
+def template_env_options() -> Dict[str, Any]:
+    """Jinja environment options for Jinja2Templates(...)"""
+    os.makedirs(JINJA_BYTECODE_CACHE_DIR, exist_ok=True)
+    return {
+        "bytecode_cache": FileSystemBytecodeCache(JINJA_BYTECODE_CACHE_DIR),
+        "auto_reload": TEMPLATE_AUTO_RELOAD
+    }
+
+class PageCache:
+    """Rendered HTML bodies, least recently used evicted first"""
+
+    def __init__(self, max_entries: int = PAGE_CACHE_MAX_ENTRIES, ttl_seconds: int = PAGE_CACHE_TTL_SECONDS):
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, ...], Tuple[float, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, ...]) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Tuple[str, ...], body: bytes):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": PAGE_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "ttl_seconds": self.ttl_seconds,
+                "pages": sorted(key[1] for key in self._entries)
+            }
+
+page_cache = PageCache()
+
+_deploy_version: Optional[str] = None
+
+def deploy_version() -> str:
+    """Changes whenever build_assets.py writes a new manifest"""
+    global _deploy_version
+    if _deploy_version is None:
+        manifest = sorted(load_manifest().items())
+        _deploy_version = hashlib.sha1(repr(manifest).encode()).hexdigest()[:12]
+    return _deploy_version
+
+def page_cache_key(request: Request, name: str) -> Tuple[str, ...]:
+    theme = request.cookies.get(THEME_COOKIE, DEFAULT_THEME)
+    return (deploy_version(), name, "anonymous", theme)
+
+def render_page(templates: Jinja2Templates, request: Request, name: str,
+                context: Optional[Dict[str, Any]] = None, current_user: Any = None) -> Response:
+    """
+    TemplateResponse for the page, served from the page cache for anonymous visitors
+    Signed-in users (current_user set) always get a fresh render.
+    """
+    context = {"request": request, "current_user": current_user, **(context or {})}
+    if not PAGE_CACHE_ENABLED or current_user is not None:
+        return templates.TemplateResponse(name, context)
+
+    key = page_cache_key(request, name)
+    body = page_cache.get(key)
+    if body is not None:
+        return HTMLResponse(body, headers={"X-Page-Cache": "hit"})
+
+    response = templates.TemplateResponse(name, context)
+    if response.status_code == 200:
+        page_cache.set(key, response.body)
+    response.headers["X-Page-Cache"] = "miss"
+    return response
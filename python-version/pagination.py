@@ -0,0 +1,22 @@
+"""
+Keyset pagination cursors
+A cursor is an opaque token for the id of the last row on a page. Pages are
+ordered by id, which increases with creation time; created_at is not used
+because older rows store it in a different format than bound parameters.
+"""
+
+import json
+import base64
+
+def encode_id_cursor(row_id: int) -> str:
+    """Opaque cursor pointing after the given id (pages ordered by id descending)"""
+    return base64.urlsafe_b64encode(json.dumps([row_id]).encode()).decode().rstrip("=")
+
+def decode_id_cursor(cursor: str) -> int:
+    """Decode an id cursor; raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        (row_id,) = json.loads(raw)
+        return int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
@@ -0,0 +1,93 @@
+"""
+Process-wide PayPal REST client
+A paypalrestsdk Api that caches the OAuth access token until shortly before it
+expires, lets one thread refresh it while the others wait for the result, and
+sends every call through a pooled requests.Session so TLS connections are reused
+between payouts. Imported on first use by paypal_integration.get_paypal_client().
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict
+import requests
+import paypalrestsdk
+from requests.adapters import HTTPAdapter
+import config  # noqa: F401 - loads .env
+from metrics import observe_upstream, paypal_token_refreshes
+
+logger = logging.getLogger(__name__)
+
+# PayPal Client Configuration
+# Refresh this long before the token's expires_in runs out
+PAYPAL_TOKEN_REFRESH_MARGIN = int(os.getenv("PAYPAL_TOKEN_REFRESH_MARGIN", "300"))
+PAYPAL_POOL_SIZE = int(os.getenv("PAYPAL_POOL_SIZE", "10"))  # kept-alive connections to the PayPal API
+PAYPAL_TIMEOUT = float(os.getenv("PAYPAL_TIMEOUT", "30"))
+
+class PayPalClient(paypalrestsdk.Api):
+    """paypalrestsdk.Api with a shared token cache and connection pool; safe to use from any thread"""
+
+    def __init__(self, options: Dict[str, Any]):
+        super().__init__(options)
+        self._token_lock = threading.Lock()
+        self._token_expires_at = 0.0  # monotonic; 0 until the first token
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=PAYPAL_POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _token_fresh(self) -> bool:
+        return self.token_hash is not None and time.monotonic() < self._token_expires_at
+
+    def get_token_hash(self, authorization_code=None, refresh_token=None, headers=None):
+        """Cached client-credentials token; fetched by a single thread when missing or about to expire"""
+        if authorization_code is not None or refresh_token is not None:
+            return super().get_token_hash(authorization_code, refresh_token, headers)
+
+        if self._token_fresh():
+            return self.token_hash
+
+        with self._token_lock:
+            # Another thread may have refreshed it while we waited
+            if self._token_fresh():
+                return self.token_hash
+
+            if not self._token_expires_at:
+                reason = "initial"
+            elif self.token_hash is None and time.monotonic() < self._token_expires_at:
+                reason = "unauthorized"  # the SDK drops the token when PayPal answers 401
+            else:
+                reason = "expiry"
+
+            self.token_hash = None
+            try:
+                with observe_upstream("paypal", "oauth_token"):
+                    token = super().get_token_hash(headers=headers)
+            except Exception:
+                paypal_token_refreshes.inc(reason, "failed")
+                raise
+
+            lifetime = float(token.get("expires_in") or 0)
+            if lifetime:
+                # Short-lived tokens (e.g. a test stand-in) are refreshed halfway through instead
+                self._token_expires_at = time.monotonic() + max(lifetime - PAYPAL_TOKEN_REFRESH_MARGIN, lifetime / 2)
+            else:
+                # No lifetime given: keep it until PayPal rejects it
+                self._token_expires_at = float("inf")
+            paypal_token_refreshes.inc(reason, "ok")
+            logger.info("Fetched PayPal access token (%s), valid for %.0fs", reason, lifetime)
+            return token
+
+    def http_call(self, url, method, **kwargs):
+        """The SDK's HTTP call, on the pooled session and with a timeout"""
+        response = self.session.request(method, url, proxies=self.proxies, timeout=PAYPAL_TIMEOUT, **kwargs)
+        return self.handle_response(response, response.content.decode("utf-8"))
+
+    def payout(self, attributes: Dict[str, Any]) -> paypalrestsdk.Payout:
+        """New payout batch bound to this client"""
+        return paypalrestsdk.Payout(attributes, api=self)
+
+    def find_payout(self, batch_id: str) -> paypalrestsdk.Payout:
+        return paypalrestsdk.Payout.find(batch_id, api=self)
@@ -5,30 +5,64 @@ Handles automated payouts to users
 
 import os
 import logging
-import paypalrestsdk
+import threading
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from database import User, Payout
-from dotenv import load_dotenv
-
-load_dotenv()
+from pagination import encode_id_cursor, decode_id_cursor
+from cache_versions import bump_ledger_version
+from live_events import publish_after_commit
+from metrics import observe_upstream
+from platform_counters import record_payout_status, get_counters, get_payout_status_totals
+import config  # noqa: F401 - loads .env
 
 # PayPal Configuration
 PAYPAL_CLIENT_ID = os.getenv("PAYPAL_CLIENT_ID", "")
 PAYPAL_CLIENT_SECRET = os.getenv("PAYPAL_CLIENT_SECRET", "")
 PAYPAL_MODE = os.getenv("PAYPAL_MODE", "sandbox")  # 'sandbox' or 'live'
+PAYPAL_API_BASE = os.getenv("PAYPAL_API_BASE", "")  # e.g. a local stand-in for load tests
 
 # Payout Settings
 MINIMUM_PAYOUT_AMOUNT = float(os.getenv("MINIMUM_PAYOUT_AMOUNT", "5.00"))
 MAXIMUM_PAYOUT_AMOUNT = float(os.getenv("MAXIMUM_PAYOUT_AMOUNT", "10000.00"))
 PAYOUT_FEE_PERCENTAGE = float(os.getenv("PAYOUT_FEE_PERCENTAGE", "0.02"))  # 2% platform fee
 
+# Payout history pagination
+PAYOUT_HISTORY_PAGE_SIZE = 20
+PAYOUT_HISTORY_MAX_PAGE_SIZE = 100
+
 # Logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_client_lock = threading.Lock()
+_client = None
+
+def get_paypal_client():
+    """
+    The process-wide PayPal client (see paypal_client.py), created on first use
+    The SDK is slow to import, and sharing one client keeps its OAuth token and connections warm.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from paypal_client import PayPalClient
+                
+                options = {
+                    "mode": PAYPAL_MODE,
+                    "client_id": PAYPAL_CLIENT_ID,
+                    "client_secret": PAYPAL_CLIENT_SECRET
+                }
+                if PAYPAL_API_BASE:
+                    options["endpoint"] = PAYPAL_API_BASE
+                
+                if not all([PAYPAL_CLIENT_ID, PAYPAL_CLIENT_SECRET]):
+                    logger.warning("PayPal credentials not fully configured")
+                _client = PayPalClient(options)
+    return _client
+
 @dataclass
 class PayoutRequest:
     """Payout request data structure"""
@@ -54,16 +88,7 @@ class PayPalPayoutManager:
         self.client_id = PAYPAL_CLIENT_ID
         self.client_secret = PAYPAL_CLIENT_SECRET
         self.mode = PAYPAL_MODE
-        
-        # Configure PayPal SDK
-        paypalrestsdk.configure({
-            "mode": self.mode,
-            "client_id": self.client_id,
-            "client_secret": self.client_secret
-        })
-        
-        if not all([self.client_id, self.client_secret]):
-            logger.warning("PayPal credentials not fully configured")
+        # API calls go through the shared client from get_paypal_client()
     
     def validate_payout_request(self, user: User, amount: float) -> Dict[str, Any]:
         """Validate a payout request"""
@@ -113,7 +138,7 @@ class PayPalPayoutManager:
             sender_batch_id = f"PAYOUT_{payout_request.user_id}_{int(datetime.utcnow().timestamp())}"
             
             # Create payout batch
-            payout = paypalrestsdk.Payout({
+            payout = get_paypal_client().payout({
                 "sender_batch_header": {
                     "sender_batch_id": sender_batch_id,
                     "email_subject": "You have received a payout from OfferEarner!",
@@ -132,8 +157,12 @@ class PayPalPayoutManager:
             })
             
             # Execute the payout
-            if payout.create(sync_mode=True):
-                logger.info(f"Payout created successfully: {payout.batch_header.payout_batch_id}")
+            with observe_upstream("paypal", "create_payout") as call:
+                created = payout.create(sync_mode=True)
+                call.failed = not created
+            
+            if created:
+                logger.info("Payout created successfully: %s", payout.batch_header.payout_batch_id)
                 
                 return PayoutResult(
                     success=True,
@@ -142,14 +171,14 @@ class PayPalPayoutManager:
                     transaction_fee=transaction_fee
                 )
             else:
-                logger.error(f"Payout creation failed: {payout.error}")
+                logger.error("Payout creation failed: %s", payout.error)
                 return PayoutResult(
                     success=False,
                     error_message=str(payout.error)
                 )
                 
         except Exception as e:
-            logger.error(f"PayPal payout error: {e}")
+            logger.error("PayPal payout error: %s", e)
             return PayoutResult(
                 success=False,
                 error_message=str(e)
@@ -159,7 +188,7 @@ class PayPalPayoutManager:
         """Create a demo payout for testing without real PayPal API"""
         import uuid
         
-        logger.info(f"Creating demo payout for user {payout_request.user_id}")
+        logger.info("Creating demo payout for user %s", payout_request.user_id)
         
         # Simulate processing delay
         import time
@@ -205,7 +234,7 @@ class PayPalPayoutManager:
                 })
             
             # Create batch payout
-            payout = paypalrestsdk.Payout({
+            payout = get_paypal_client().payout({
                 "sender_batch_header": {
                     "sender_batch_id": sender_batch_id,
                     "email_subject": "You have received a payout from OfferEarner!",
@@ -214,7 +243,11 @@ class PayPalPayoutManager:
                 "items": items
             })
             
-            if payout.create(sync_mode=True):
+            with observe_upstream("paypal", "create_batch_payout") as call:
+                created = payout.create(sync_mode=True)
+                call.failed = not created
+            
+            if created:
                 return {
                     "success": True,
                     "batch_id": payout.batch_header.payout_batch_id,
@@ -229,7 +262,7 @@ class PayPalPayoutManager:
                 }
                 
         except Exception as e:
-            logger.error(f"Batch payout error: {e}")
+            logger.error("Batch payout error: %s", e)
             return {
                 "success": False,
                 "error": str(e)
@@ -238,7 +271,8 @@ class PayPalPayoutManager:
     def get_payout_status(self, batch_id: str) -> Dict[str, Any]:
         """Get the status of a payout batch"""
         try:
-            payout = paypalrestsdk.Payout.find(batch_id)
+            with observe_upstream("paypal", "get_payout"):
+                payout = get_paypal_client().find_payout(batch_id)
             
             return {
                 "success": True,
@@ -259,12 +293,21 @@ class PayPalPayoutManager:
             }
             
         except Exception as e:
-            logger.error(f"Error getting payout status: {e}")
+            logger.error("Error getting payout status: %s", e)
             return {
                 "success": False,
                 "error": str(e)
             }
 
+_payout_manager = None
+
+def get_payout_manager() -> PayPalPayoutManager:
+    """Shared payout manager; it only holds configuration, so one per process is enough"""
+    global _payout_manager
+    if _payout_manager is None:
+        _payout_manager = PayPalPayoutManager()
+    return _payout_manager
+
 def process_payout_request(db: Session, user_id: int, amount: float) -> Dict[str, Any]:
     """Process a payout request from a user"""
     
@@ -273,8 +316,7 @@ def process_payout_request(db: Session, user_id: int, amount: float) -> Dict[str
     if not user:
         return {"success": False, "error": "User not found"}
     
-    # Initialize PayPal manager
-    paypal_manager = PayPalPayoutManager()
+    paypal_manager = get_payout_manager()
     
     # Validate request
     validation = paypal_manager.validate_payout_request(user, amount)
@@ -299,11 +341,13 @@ def process_payout_request(db: Session, user_id: int, amount: float) -> Dict[str
             }
         
         # Create payout record in database
+        now = datetime.utcnow()
         payout_record = Payout(
             user_id=user_id,
             amount=amount,
             method="paypal",
             status="pending",
+            requested_at=now,
             payment_details={
                 "paypal_email": user.paypal_email,
                 "gross_amount": validation["gross_amount"],
@@ -313,6 +357,7 @@ def process_payout_request(db: Session, user_id: int, amount: float) -> Dict[str
         )
         db.add(payout_record)
         db.flush()  # Get the ID
+        record_payout_status(db, amount, None, "pending")
         
         # Create PayPal payout
         payout_request = PayoutRequest(
@@ -327,19 +372,27 @@ def process_payout_request(db: Session, user_id: int, amount: float) -> Dict[str
         if result.success:
             # Update payout record with PayPal details
             payout_record.status = "processing"
+            record_payout_status(db, amount, "pending", "processing")
             payout_record.transaction_id = result.batch_id
-            payout_record.payment_details.update({
+            # Reassign so the JSON column change is detected
+            payout_record.payment_details = {
+                **payout_record.payment_details,
                 "paypal_batch_id": result.batch_id,
                 "paypal_item_id": result.payout_item_id,
                 "transaction_fee_actual": result.transaction_fee
-            })
+            }
             
             # Deduct amount from user balance
             user.balance -= amount
+            bump_ledger_version(db, user_id)
+            publish_after_commit(db, "payout", {
+                "payout_id": payout_record.id, "status": "processing", "amount": amount
+            }, user_id)
+            publish_after_commit(db, "balance", {"balance": user.balance}, user_id)
             
             db.commit()
             
-            logger.info(f"Payout processed for user {user_id}: ${amount:.2f}")
+            logger.info("Payout processed for user %s: $%.2f", user_id, amount)
             
             return {
                 "success": True,
@@ -355,6 +408,10 @@ def process_payout_request(db: Session, user_id: int, amount: float) -> Dict[str
             # Payout failed - update record
             payout_record.status = "failed"
             payout_record.notes = result.error_message
+            record_payout_status(db, amount, "pending", "failed")
+            publish_after_commit(db, "payout", {
+                "payout_id": payout_record.id, "status": "failed", "amount": amount
+            }, user_id)
             db.commit()
             
             return {
@@ -364,54 +421,92 @@ def process_payout_request(db: Session, user_id: int, amount: float) -> Dict[str
             
     except Exception as e:
         db.rollback()
-        logger.error(f"Payout processing error: {e}")
+        logger.error("Payout processing error: %s", e)
         return {
             "success": False,
             "error": "Internal error processing payout"
         }
 
-def get_user_payout_history(db: Session, user_id: int) -> List[Dict[str, Any]]:
-    """Get payout history for a user"""
+def get_user_payout_history(db: Session, user_id: int,
+                            cursor: Optional[str] = None,
+                            limit: int = PAYOUT_HISTORY_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    Get one page of payout history for a user, newest first
+    Keyset pagination on id (ids increase with creation time, and unlike created_at they
+    compare the same whatever format older rows were stored in); payment_details is only
+    returned by get_user_payout
+    """
+    limit = max(1, min(limit, PAYOUT_HISTORY_MAX_PAGE_SIZE))
     
-    payouts = db.query(Payout).filter(
+    # List view columns only
+    query = db.query(
+        Payout.id,
+        Payout.amount,
+        Payout.method,
+        Payout.status,
+        Payout.requested_at,
+        Payout.processed_at,
+        Payout.transaction_id
+    ).filter(Payout.user_id == user_id)
+    
+    if cursor:
+        query = query.filter(Payout.id < decode_id_cursor(cursor))
+    
+    # Fetch one extra row to know whether there is a next page
+    rows = query.order_by(Payout.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_id_cursor(rows[-1].id)
+    
+    return {
+        "payouts": [
+            {
+                "id": payout.id,
+                "amount": payout.amount,
+                "method": payout.method,
+                "status": payout.status,
+                "requested_at": payout.requested_at.isoformat() if payout.requested_at else None,
+                "processed_at": payout.processed_at.isoformat() if payout.processed_at else None,
+                "transaction_id": payout.transaction_id
+            }
+            for payout in rows
+        ],
+        "next_cursor": next_cursor
+    }
+
+def get_user_payout(db: Session, user_id: int, payout_id: int) -> Optional[Dict[str, Any]]:
+    """Get a single payout of a user, including payment details"""
+    
+    payout = db.query(Payout).filter(
+        Payout.id == payout_id,
         Payout.user_id == user_id
-    ).order_by(Payout.created_at.desc()).all()
+    ).first()
+    if not payout:
+        return None
     
-    return [
-        {
-            "id": payout.id,
-            "amount": payout.amount,
-            "method": payout.method,
-            "status": payout.status,
-            "requested_at": payout.requested_at.isoformat() if payout.requested_at else None,
-            "processed_at": payout.processed_at.isoformat() if payout.processed_at else None,
-            "transaction_id": payout.transaction_id,
-            "payment_details": payout.payment_details
-        }
-        for payout in payouts
-    ]
+    return {
+        "id": payout.id,
+        "amount": payout.amount,
+        "method": payout.method,
+        "status": payout.status,
+        "requested_at": payout.requested_at.isoformat() if payout.requested_at else None,
+        "processed_at": payout.processed_at.isoformat() if payout.processed_at else None,
+        "transaction_id": payout.transaction_id,
+        "notes": payout.notes,
+        "payment_details": payout.payment_details
+    }
 
 def get_platform_payout_stats(db: Session) -> Dict[str, Any]:
     """Get platform payout statistics (admin only)"""
-    from sqlalchemy import func
-    
-    # Total payouts by status
-    payout_stats = db.query(
-        Payout.status,
-        func.count(Payout.id).label('count'),
-        func.sum(Payout.amount).label('total_amount')
-    ).group_by(Payout.status).all()
-    
-    stats = {}
-    for status, count, total in payout_stats:
-        stats[status] = {
-            "count": count,
-            "total_amount": float(total or 0)
-        }
+    # Total payouts by status, from counters maintained by the payout flow
+    stats = get_payout_status_totals(get_counters(db))
     
-    # Recent payouts
+    # Recent payouts (primary key order follows creation order)
     recent_payouts = db.query(Payout).order_by(
-        Payout.created_at.desc()
+        Payout.id.desc()
     ).limit(10).all()
     
     return {
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Platform-wide counters for the admin stats endpoints
+Counters are incremented in the same transaction as the change they count,
+so reading platform stats never scans earnings, user_offers or payouts.
+
+After deploying onto an existing database, run once:
+    python platform_counters.py rebuild
+"""
+
+import argparse
+from typing import Dict, Optional
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from database import PlatformCounter, UserOffer, Earning, Payout
+
+# Counter names
+OFFERS_COMPLETED = "offers.completed"
+EARNINGS_TOTAL = "earnings.total"
+PAYOUTS_PREFIX = "payouts."
+
+def payout_count_counter(status: str) -> str:
+    return f"{PAYOUTS_PREFIX}{status}.count"
+
+def payout_amount_counter(status: str) -> str:
+    return f"{PAYOUTS_PREFIX}{status}.amount"
+
+def increment_counter(db: Session, name: str, delta: float):
+    """
+    Atomically add delta to a counter, creating it if needed
+    Does not commit - the caller's transaction owns the change
+    """
+    updated = db.query(PlatformCounter).filter(PlatformCounter.name == name).update(
+        {PlatformCounter.value: PlatformCounter.value + delta},
+        synchronize_session=False
+    )
+    if updated:
+        return
+
+    try:
+        with db.begin_nested():
+            db.add(PlatformCounter(name=name, value=delta))
+    except IntegrityError:
+        # Created concurrently - fall back to the atomic update
+        db.query(PlatformCounter).filter(PlatformCounter.name == name).update(
+            {PlatformCounter.value: PlatformCounter.value + delta},
+            synchronize_session=False
+        )
+
+def record_offer_completion(db: Session, amount: float, newly_completed: bool):
+    """Count a completion earning; newly_completed is False for repeat completions of one user offer"""
+    if newly_completed:
+        increment_counter(db, OFFERS_COMPLETED, 1)
+    increment_counter(db, EARNINGS_TOTAL, amount)
+
+def record_payout_status(db: Session, amount: float,
+                         old_status: Optional[str], new_status: Optional[str]):
+    """Move a payout between status buckets (old_status None for a new payout)"""
+    if old_status == new_status:
+        return
+    if old_status:
+        increment_counter(db, payout_count_counter(old_status), -1)
+        increment_counter(db, payout_amount_counter(old_status), -amount)
+    if new_status:
+        increment_counter(db, payout_count_counter(new_status), 1)
+        increment_counter(db, payout_amount_counter(new_status), amount)
+
+def get_counters(db: Session) -> Dict[str, float]:
+    """Read all counters in one query"""
+    return {name: value for name, value in db.query(PlatformCounter.name, PlatformCounter.value).all()}
+
+def get_payout_status_totals(counters: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+    """Payout count and total amount per status, from the counters"""
+    stats = {}
+    for name, value in counters.items():
+        if not name.startswith(PAYOUTS_PREFIX):
+            continue
+        status, field = name[len(PAYOUTS_PREFIX):].rsplit(".", 1)
+        stats.setdefault(status, {"count": 0, "total_amount": 0.0})
+        if field == "count":
+            stats[status]["count"] = int(value)
+        else:
+            stats[status]["total_amount"] = float(value)
+
+    # Drop statuses that no payout is in any more
+    return {status: totals for status, totals in stats.items() if totals["count"]}
+
+def rebuild_platform_counters(db: Session) -> Dict[str, float]:
+    """Recompute every counter from the source tables (full scans)"""
+    counters = {
+        OFFERS_COMPLETED: float(db.query(UserOffer).filter(UserOffer.status == "completed").count()),
+        EARNINGS_TOTAL: float(db.query(func.sum(Earning.amount)).scalar() or 0.0)
+    }
+
+    payout_stats = db.query(
+        Payout.status,
+        func.count(Payout.id),
+        func.sum(Payout.amount)
+    ).group_by(Payout.status).all()
+    for status, count, total in payout_stats:
+        counters[payout_count_counter(status)] = float(count)
+        counters[payout_amount_counter(status)] = float(total or 0)
+
+    # Only the counters computed here; the table also holds e.g. the catalogue version
+    db.query(PlatformCounter).filter(or_(
+        PlatformCounter.name.in_([OFFERS_COMPLETED, EARNINGS_TOTAL]),
+        PlatformCounter.name.like(f"{PAYOUTS_PREFIX}%")
+    )).delete(synchronize_session=False)
+    for name, value in counters.items():
+        db.add(PlatformCounter(name=name, value=value))
+    db.commit()
+    return counters
+
+def main():
+    parser = argparse.ArgumentParser(description="Platform counters management")
+    parser.add_argument("command", choices=["rebuild", "show"], help="Command to run")
+    args = parser.parse_args()
+
+    from database import SessionLocal, init_db
+    init_db()
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            counters = rebuild_platform_counters(db)
+            print(f"✅ Rebuilt {len(counters)} platform counters")
+        else:
+            counters = get_counters(db)
+        for name, value in sorted(counters.items()):
+            print(f"  {name:<35} {value:.2f}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
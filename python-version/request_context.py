@@ -0,0 +1,71 @@
+"""
+Per-request context shared by the instrumentation middlewares
+Holds the current request's stats in a context variable so any module
+(SQL event hooks, upstream calls) can attribute work to the request
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional
+
+@dataclass
+class RequestStats:
+    """Work done while handling one request"""
+    scope: Dict[str, Any]
+    sql_count: int = 0
+    sql_seconds: float = 0.0
+    # Server-Timing phase -> seconds (auth, upstream, serialization, template)
+    phases: Dict[str, float] = field(default_factory=dict)
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+@contextmanager
+def request_scope(scope) -> Iterator[RequestStats]:
+    """Bind RequestStats for this request, reusing one an outer middleware already bound"""
+    stats = current_request.get()
+    if stats is not None:
+        yield stats
+        return
+
+    stats = RequestStats(scope=scope)
+    token = current_request.set(stats)
+    try:
+        yield stats
+    finally:
+        current_request.reset(token)
+
+def add_phase(name: str, seconds: float):
+    """Add time to a phase of the current request (no-op outside a request)"""
+    stats = current_request.get()
+    if stats is not None:
+        stats.phases[name] = stats.phases.get(name, 0.0) + seconds
+
+@contextmanager
+def timed_phase(name: str) -> Iterator[None]:
+    """Time a block as part of a Server-Timing phase, e.g. with timed_phase("auth"):"""
+    stats = current_request.get()
+    if stats is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.phases[name] = stats.phases.get(name, 0.0) + time.perf_counter() - started
+
+def route_template(scope) -> str:
+    """
+    Route path template for labels, e.g. /api/payouts/{payout_id}
+    Raw paths are never used, so scanners can't blow up label cardinality
+    """
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    if "endpoint" in scope:
+        # Mounted app such as /static
+        return (scope.get("root_path") or "") + "/*"
+    return "unmatched"
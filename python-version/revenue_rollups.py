@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Daily revenue rollups per provider and category
+Buckets are updated incrementally when an offer is completed, so revenue
+reports read pre-aggregated rows instead of earnings / user_offers.
+
+Backfill from existing data with:
+    python revenue_rollups.py backfill
+
+The backfill counts the same completion earnings the incremental path records,
+but per-completion provider revenue is not stored, so it uses each offer's
+current reward_amount; postback-reported revenue of past completions is lost.
+"""
+
+import argparse
+from typing import Dict, Any, List, Optional
+from datetime import date, datetime
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from database import RevenueRollup, UserOffer, Offer, Earning
+
+def _bucket_filter(db: Session, day: date, provider: str, category: str):
+    return db.query(RevenueRollup).filter(
+        RevenueRollup.day == day,
+        RevenueRollup.provider == provider,
+        RevenueRollup.category == category
+    )
+
+def record_completion_revenue(db: Session, day: date, provider: str, category: str,
+                              user_payout: float, provider_revenue: float):
+    """
+    Add one completion to its (day, provider, category) bucket
+    Does not commit - the caller's transaction owns the change
+    """
+    platform_margin = round(provider_revenue - user_payout, 2)
+    increments = {
+        RevenueRollup.completions: RevenueRollup.completions + 1,
+        RevenueRollup.user_payout: RevenueRollup.user_payout + user_payout,
+        RevenueRollup.provider_revenue: RevenueRollup.provider_revenue + provider_revenue,
+        RevenueRollup.platform_margin: RevenueRollup.platform_margin + platform_margin
+    }
+
+    if _bucket_filter(db, day, provider, category).update(increments, synchronize_session=False):
+        return
+
+    try:
+        with db.begin_nested():
+            db.add(RevenueRollup(
+                day=day,
+                provider=provider,
+                category=category,
+                completions=1,
+                user_payout=user_payout,
+                provider_revenue=provider_revenue,
+                platform_margin=platform_margin
+            ))
+    except IntegrityError:
+        # Bucket created concurrently - fall back to the atomic update
+        _bucket_filter(db, day, provider, category).update(increments, synchronize_session=False)
+
+def get_revenue_report(db: Session, start: date, end: date,
+                       provider: Optional[str] = None,
+                       category: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Daily buckets and totals for an inclusive date range
+    Days rebuilt by a backfill report provider revenue at the offers' current prices
+    """
+    query = db.query(RevenueRollup).filter(
+        RevenueRollup.day >= start,
+        RevenueRollup.day <= end
+    )
+    if provider:
+        query = query.filter(RevenueRollup.provider == provider)
+    if category:
+        query = query.filter(RevenueRollup.category == category)
+
+    buckets: List[Dict[str, Any]] = []
+    totals = {"completions": 0, "user_payout": 0.0, "provider_revenue": 0.0, "platform_margin": 0.0}
+
+    for row in query.order_by(RevenueRollup.day, RevenueRollup.provider, RevenueRollup.category):
+        buckets.append({
+            "day": row.day.isoformat(),
+            "provider": row.provider,
+            "category": row.category,
+            "completions": row.completions,
+            "user_payout": round(row.user_payout, 2),
+            "provider_revenue": round(row.provider_revenue, 2),
+            "platform_margin": round(row.platform_margin, 2)
+        })
+        totals["completions"] += row.completions
+        totals["user_payout"] += row.user_payout
+        totals["provider_revenue"] += row.provider_revenue
+        totals["platform_margin"] += row.platform_margin
+
+    for key in ("user_payout", "provider_revenue", "platform_margin"):
+        totals[key] = round(totals[key], 2)
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "totals": totals,
+        "buckets": buckets
+    }
+
+def backfill_revenue_rollups(db: Session) -> int:
+    """
+    Rebuild all buckets from completion earnings, one per complete_offer call like the incremental path
+    Provider revenue uses each offer's current reward_amount
+    Returns the number of buckets written
+    """
+    day_column = func.date(Earning.created_at)
+    rows = db.query(
+        day_column,
+        Offer.provider,
+        Offer.category,
+        func.count(Earning.id),
+        func.sum(Earning.amount),
+        func.sum(Offer.reward_amount)
+    ).join(UserOffer, Earning.user_offer_id == UserOffer.id).join(
+        Offer, UserOffer.offer_id == Offer.id
+    ).filter(
+        Earning.type == "task_completion"
+    ).group_by(day_column, Offer.provider, Offer.category).all()
+
+    db.query(RevenueRollup).delete(synchronize_session=False)
+    for day, provider, category, completions, user_payout, provider_revenue in rows:
+        # SQLite returns the date as a string
+        if not isinstance(day, date):
+            day = datetime.strptime(str(day)[:10], "%Y-%m-%d").date()
+        user_payout = float(user_payout or 0)
+        provider_revenue = float(provider_revenue or 0)
+        db.add(RevenueRollup(
+            day=day,
+            provider=provider,
+            category=category,
+            completions=completions,
+            user_payout=user_payout,
+            provider_revenue=provider_revenue,
+            platform_margin=round(provider_revenue - user_payout, 2)
+        ))
+    db.commit()
+    return len(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Revenue rollup management")
+    parser.add_argument("command", choices=["backfill"], help="Command to run")
+    parser.parse_args()
+
+    from database import SessionLocal, init_db
+    init_db()
+    db = SessionLocal()
+    try:
+        bucket_count = backfill_revenue_rollups(db)
+        print(f"✅ Backfilled {bucket_count} revenue buckets")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
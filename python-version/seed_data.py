@@ -1,15 +1,40 @@
+#!/usr/bin/env python3
 """
-Seed database with sample offers
+Seed database with sample offers, or bulk-generate a synthetic dataset
+
+    python seed_data.py                            # 8 hand-written sample offers
+    python seed_data.py generate --preset small    # 10k users, 200k user offers
+    python seed_data.py generate --preset large    # 1M users, 50k offers, 20M user offers / earnings, 1M payouts
+
+Generated data follows production-like distributions: a heavy-tailed split of
+activity across users (most completions come from a few power users), Zipf
+offer popularity, log-normal rewards and signups skewed towards recent dates.
+Rows are written with batched Core inserts, or COPY on PostgreSQL, and the
+derived tables (platform counters, revenue rollups) are rebuilt at the end.
 """
 
+import io
+import csv
+import math
+import time
+import random
+import argparse
+from bisect import bisect
+from operator import itemgetter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import func, DateTime, JSON
 from sqlalchemy.orm import sessionmaker
-from database import engine, Offer, init_db
+from database import engine, Offer, User, UserOffer, Earning, Payout, init_db
+from auth import get_password_hash
 import json
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def seed_offers():
     """Add sample offers to database"""
+    from cache_versions import bump_catalogue_version
+
     # Initialize database first
     init_db()
     
@@ -128,9 +153,517 @@ def seed_offers():
         db_offer = Offer(**offer_data)
         db.add(db_offer)
     
+    # Offer listings are cached on the catalogue version
+    bump_catalogue_version(db)
     db.commit()
     db.close()
     print(f"Added {len(sample_offers)} sample offers to database")
 
+# Synthetic dataset generation
+
+PRESETS = {
+    "small": {"users": 10_000, "offers": 1_000, "user_offers": 200_000, "earnings": 200_000, "payouts": 10_000},
+    "medium": {"users": 100_000, "offers": 10_000, "user_offers": 2_000_000, "earnings": 2_000_000, "payouts": 100_000},
+    "large": {"users": 1_000_000, "offers": 50_000, "user_offers": 20_000_000, "earnings": 20_000_000, "payouts": 1_000_000}
+}
+
+PROVIDERS = (("lootably", 0.45), ("adgem", 0.25), ("adgatemedia", 0.2), ("cpalead", 0.1))
+CATEGORIES = (("survey", 0.35), ("app", 0.25), ("game", 0.15), ("signup", 0.12), ("video", 0.08), ("email", 0.05))
+USER_OFFER_STATUSES = (("completed", 0.7), ("started", 0.15), ("in_progress", 0.1), ("failed", 0.05))
+# The latest payout may still be in flight; older ones have settled
+LATEST_PAYOUT_STATUSES = (("completed", 0.85), ("failed", 0.07), ("processing", 0.05), ("pending", 0.03))
+SETTLED_PAYOUT_STATUSES = (("completed", 0.92), ("failed", 0.08))
+BONUS_TYPES = (("bonus", 0.7), ("referral", 0.3))
+BONUS_AMOUNTS = (0.10, 0.25, 0.50, 1.00, 2.00)
+
+PARETO_ALPHA = 1.16  # ~80% of activity from ~20% of users
+MAX_ACTIVITY_WEIGHT = 500.0  # caps the single heaviest user
+INACTIVE_USER_SHARE = 0.3  # signed up, never started an offer
+MINIMUM_PAYOUT = 5.00
+PAYOUT_FEE_PERCENTAGE = 0.02
+GENERATED_PASSWORD = "password123"
+PROGRESS_INTERVAL_SECONDS = 5
+
+def _weighted(choices):
+    """(values, cumulative weights) for fast repeated sampling"""
+    values = [value for value, _ in choices]
+    cumulative, total = [], 0.0
+    for _, weight in choices:
+        total += weight
+        cumulative.append(total)
+    return values, cumulative
+
+def _pick(rng: random.Random, table) -> Any:
+    values, cumulative = table
+    return values[bisect(cumulative, rng.random() * cumulative[-1])]
+
+def _zipf_cum_weights(count: int, exponent: float = 0.8) -> List[float]:
+    """Cumulative Zipf weights: rank 1 is the most popular"""
+    cumulative, total = [], 0.0
+    for rank in range(1, count + 1):
+        total += 1.0 / rank ** exponent
+        cumulative.append(total)
+    return cumulative
+
+def _stochastic_round(rng: random.Random, value: float) -> int:
+    whole = int(value)
+    return whole + (1 if rng.random() < value - whole else 0)
+
+class BulkWriter:
+    """
+    Buffers rows per table and writes them in FK order
+    PostgreSQL (psycopg2) uses COPY, SQLite a raw executemany of pre-rendered
+    tuples (Core's per-row bind processing dominates there); other databases
+    use batched Core inserts
+    """
+
+    TABLE_ORDER = ("offers", "users", "user_offers", "earnings", "payouts")
+
+    def __init__(self, connection, batch_size: int):
+        self.connection = connection
+        self.batch_size = batch_size
+        dialect = connection.dialect
+        if dialect.name == "postgresql" and dialect.driver == "psycopg2":
+            self.method = "COPY"
+        elif dialect.name == "sqlite":
+            self.method = "executemany"
+        else:
+            self.method = "Core inserts"
+        self.tables = {model.__tablename__: model.__table__ for model in (Offer, User, UserOffer, Earning, Payout)}
+        self.buffers: Dict[str, List[Dict[str, Any]]] = {name: [] for name in self.TABLE_ORDER}
+        self.buffered = 0
+        self.written: Dict[str, int] = {name: 0 for name in self.TABLE_ORDER}
+        self.started = time.perf_counter()
+        self.last_report = 0.0
+
+    def add(self, table_name: str, row: Dict[str, Any]):
+        self.buffers[table_name].append(row)
+        self.buffered += 1
+
+    def extend(self, table_name: str, rows: List[Dict[str, Any]]):
+        self.buffers[table_name].extend(rows)
+        self.buffered += len(rows)
+
+    def flush_if_full(self):
+        if self.buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered rows, parents before children, in one transaction"""
+        if not self.buffered:
+            return
+        with self.connection.begin():
+            for name in self.TABLE_ORDER:
+                rows = self.buffers[name]
+                if not rows:
+                    continue
+                if self.method == "COPY":
+                    self._copy(name, rows)
+                elif self.method == "executemany":
+                    self._executemany(name, rows)
+                else:
+                    self.connection.execute(self.tables[name].insert(), rows)
+                self.written[name] += len(rows)
+                self.buffers[name] = []
+        self.buffered = 0
+
+        elapsed = time.perf_counter() - self.started
+        if elapsed - self.last_report >= PROGRESS_INTERVAL_SECONDS:
+            self.report()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        self.last_report = elapsed
+        total = sum(self.written.values())
+        print(f"  {total:>12,} rows  {total / elapsed:>10,.0f} rows/s  "
+              + "  ".join(f"{name}={count:,}" for name, count in self.written.items() if count))
+
+    def _copy(self, name: str, rows: List[Dict[str, Any]]):
+        columns = list(rows[0].keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([self._copy_value(row[column]) for column in columns])
+        buffer.seek(0)
+        cursor = self.connection.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+
+    def _executemany(self, name: str, rows: List[Dict[str, Any]]):
+        columns = list(rows[0].keys())
+        statement = f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        getter = itemgetter(*columns)
+
+        # Only DateTime and JSON columns need converting - same storage formats SQLAlchemy's SQLite types use
+        table = self.tables[name]
+        converters = []
+        for index, column in enumerate(columns):
+            column_type = table.c[column].type
+            if isinstance(column_type, DateTime):
+                converters.append((index, lambda value: value.isoformat(sep=" ", timespec="microseconds")))
+            elif isinstance(column_type, JSON):
+                converters.append((index, json.dumps))
+
+        values = []
+        for row in rows:
+            row_values = list(getter(row))
+            for index, convert in converters:
+                if row_values[index] is not None:
+                    row_values[index] = convert(row_values[index])
+            values.append(row_values)
+
+        cursor = self.connection.connection.dbapi_connection.cursor()
+        try:
+            cursor.executemany(statement, values)
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _copy_value(value):
+        # Unquoted empty field = NULL in COPY csv format
+        if value is None:
+            return None
+        if isinstance(value, bool):
+            return "t" if value else "f"
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        return value
+
+class DatasetGenerator:
+    """Generates users with their user offers, earnings and payouts, chunk by chunk"""
+
+    def __init__(self, writer: BulkWriter, volumes: Dict[str, int], days: int,
+                 completion_rate: Optional[float], seed: int):
+        self.writer = writer
+        self.volumes = volumes
+        self.rng = random.Random(seed)
+        self.now = datetime.utcnow()
+        self.start = self.now - timedelta(days=days)
+        self.window_seconds = days * 86400
+        self.offers = []  # (id, title, user_payout)
+
+        statuses = dict(USER_OFFER_STATUSES)
+        if completion_rate is not None:
+            # Keep the ratios between the other statuses
+            others = 1 - statuses["completed"]
+            statuses = {status: (completion_rate if status == "completed" else weight / others * (1 - completion_rate))
+                        for status, weight in statuses.items()}
+        self.completion_rate = statuses["completed"] / sum(statuses.values())
+        self.user_offer_statuses = _weighted(list(statuses.items()))
+        self.latest_payout_statuses = _weighted(LATEST_PAYOUT_STATUSES)
+        self.settled_payout_statuses = _weighted(SETTLED_PAYOUT_STATUSES)
+        self.bonus_types = _weighted(BONUS_TYPES)
+        self.providers = _weighted(PROVIDERS)
+        self.categories = _weighted(CATEGORIES)
+
+        with writer.connection.begin():
+            self.next_ids = {
+                name: (writer.connection.execute(func.max(table.c.id).select()).scalar() or 0) + 1
+                for name, table in writer.tables.items()
+            }
+
+    def _next_id(self, table_name: str) -> int:
+        value = self.next_ids[table_name]
+        self.next_ids[table_name] += 1
+        return value
+
+    def _random_time_after(self, earliest: datetime) -> datetime:
+        span = (self.now - earliest).total_seconds()
+        return earliest + timedelta(seconds=self.rng.random() * max(span, 0))
+
+    def generate_offers(self) -> int:
+        """Offers with log-normal rewards; returns the number written"""
+        rng = self.rng
+        for _ in range(self.volumes["offers"]):
+            offer_id = self._next_id("offers")
+            provider = _pick(rng, self.providers)
+            category = _pick(rng, self.categories)
+            reward = round(min(max(rng.lognormvariate(math.log(1.5), 0.9), 0.05), 75.0), 2)
+            user_payout = round(reward * 0.5, 2)
+            minutes = max(1, int(rng.lognormvariate(math.log(6), 0.7)))
+            title = f"{category.title()} Offer #{offer_id}"
+            self.writer.add("offers", {
+                "id": offer_id,
+                "title": title,
+                "description": f"Synthetic {category} offer from {provider}.",
+                "provider": provider,
+                "category": category,
+                "reward_amount": reward,
+                "user_payout": user_payout,
+                "time_estimate": f"{minutes} mins",
+                "requirements": {"country": ["US", "CA", "UK"]},
+                "external_offer_id": f"SYN_{provider.upper()}_{offer_id}",
+                "callback_url": None,
+                "is_active": rng.random() < 0.8,
+                "created_at": self.start + timedelta(seconds=rng.random() * self.window_seconds)
+            })
+            self.offers.append((offer_id, title, user_payout))
+            self.writer.flush_if_full()
+        self.writer.flush()
+
+        self._rank_offers()
+        return len(self.offers)
+
+    def use_existing_offers(self):
+        """Attach activity to the active offers already in the database"""
+        table = self.writer.tables["offers"]
+        with self.writer.connection.begin():
+            rows = self.writer.connection.execute(
+                table.select().with_only_columns(table.c.id, table.c.title, table.c.user_payout)
+                .where(table.c.is_active.is_(True))
+            ).all()
+        self.offers = [tuple(row) for row in rows]
+        self._rank_offers()
+
+    def _rank_offers(self):
+        # Zipf popularity: a few offers get most of the traffic, unrelated to id order
+        self.rng.shuffle(self.offers)
+        self.offer_cum_weights = _zipf_cum_weights(len(self.offers))
+
+    def generate_users(self):
+        """Users in chunks, each followed by their user offers, earnings and payouts"""
+        rng = self.rng
+        user_count = self.volumes["users"]
+        if not user_count:
+            return
+        if not self.offers:
+            raise SystemExit("❌ No offers to attach user activity to - generate offers too")
+
+        # Heavy-tailed activity weights; inactive users get none
+        weights = [
+            0.0 if rng.random() < INACTIVE_USER_SHARE else min(rng.paretovariate(PARETO_ALPHA), MAX_ACTIVITY_WEIGHT)
+            for _ in range(user_count)
+        ]
+        total_weight = sum(weights) or 1.0
+        user_offer_rate = self.volumes["user_offers"] / total_weight
+        payout_rate = self.volumes["payouts"] / total_weight
+        expected_completions = self.volumes["user_offers"] * self.completion_rate
+        extra_earning_rate = max(self.volumes["earnings"] - expected_completions, 0) / total_weight
+
+        hashed_password = get_password_hash(GENERATED_PASSWORD)
+
+        for weight in weights:
+            user_id = self._next_id("users")
+            # Signups skewed towards recent dates (growing platform)
+            created_at = self.start + timedelta(seconds=math.sqrt(rng.random()) * self.window_seconds)
+
+            user_offers, earnings = self._user_activity(
+                user_id, created_at,
+                _stochastic_round(rng, weight * user_offer_rate),
+                _stochastic_round(rng, weight * extra_earning_rate)
+            )
+            total_earned = round(sum(earning["amount"] for earning in earnings), 2)
+            payouts = self._user_payouts(user_id, created_at, total_earned,
+                                         _stochastic_round(rng, weight * payout_rate))
+            paid_out = sum(payout["amount"] for payout in payouts if payout["status"] != "failed")
+
+            self.writer.add("users", {
+                "id": user_id,
+                "username": f"user{user_id}",
+                "email": f"user{user_id}@example.com",
+                "hashed_password": hashed_password,
+                "paypal_email": f"user{user_id}@paypal.example.com",
+                "balance": round(total_earned - paid_out, 2),
+                "total_earned": total_earned,
+                "tasks_completed": sum(1 for user_offer in user_offers if user_offer["status"] == "completed"),
+                "is_active": rng.random() < 0.98,
+                "created_at": created_at
+            })
+            self.writer.extend("user_offers", user_offers)
+            self.writer.extend("earnings", earnings)
+            self.writer.extend("payouts", payouts)
+            self.writer.flush_if_full()
+        self.writer.flush()
+
+    def _user_activity(self, user_id: int, created_at: datetime, offer_count: int, extra_count: int):
+        rng = self.rng
+        user_offers, earnings = [], []
+        if offer_count:
+            picks = rng.choices(self.offers, cum_weights=self.offer_cum_weights, k=offer_count)
+        else:
+            picks = []
+
+        for offer_id, title, user_payout in picks:
+            user_offer_id = self._next_id("user_offers")
+            started_at = self._random_time_after(created_at)
+            status = _pick(rng, self.user_offer_statuses)
+            completed_at = None
+            if status == "completed":
+                completed_at = min(started_at + timedelta(minutes=rng.lognormvariate(math.log(8), 0.8)), self.now)
+                earnings.append({
+                    "id": self._next_id("earnings"),
+                    "user_id": user_id,
+                    "user_offer_id": user_offer_id,
+                    "amount": user_payout,
+                    "type": "task_completion",
+                    "description": f"Completed offer: {title}",
+                    "created_at": completed_at
+                })
+            user_offers.append({
+                "id": user_offer_id,
+                "user_id": user_id,
+                "offer_id": offer_id,
+                "status": status,
+                "progress_data": None,
+                "started_at": started_at,
+                "completed_at": completed_at,
+                "reward_amount": user_payout,
+                "created_at": started_at
+            })
+
+        for _ in range(extra_count):
+            earning_type = _pick(rng, self.bonus_types)
+            earnings.append({
+                "id": self._next_id("earnings"),
+                "user_id": user_id,
+                "user_offer_id": None,
+                "amount": rng.choice(BONUS_AMOUNTS),
+                "type": earning_type,
+                "description": "Referral reward" if earning_type == "referral" else "Daily bonus",
+                "created_at": self._random_time_after(created_at)
+            })
+
+        # History pages are keyed on id, so a user's earnings get ids in time order like live ones
+        ids = sorted(earning["id"] for earning in earnings)
+        earnings.sort(key=lambda earning: earning["created_at"])
+        for earning, earning_id in zip(earnings, ids):
+            earning["id"] = earning_id
+        return user_offers, earnings
+
+    def _user_payouts(self, user_id: int, created_at: datetime, total_earned: float, planned: int):
+        """Payouts that never exceed what the user earned, oldest first"""
+        rng = self.rng
+        spendable = total_earned * rng.uniform(0.6, 0.95)
+        count = min(planned, int(spendable // MINIMUM_PAYOUT))
+        if count <= 0:
+            return []
+
+        amount = round(spendable / count, 2)
+        requested = sorted(self._random_time_after(created_at) for _ in range(count))
+        payouts = []
+        for index, requested_at in enumerate(requested):
+            table = self.latest_payout_statuses if index == count - 1 else self.settled_payout_statuses
+            status = _pick(rng, table)
+            fee = round(amount * PAYOUT_FEE_PERCENTAGE, 2)
+            settled = status in ("completed", "failed")
+            batch_id = f"SYNBATCH{user_id}X{index}" if status != "pending" else None
+            payouts.append({
+                "id": self._next_id("payouts"),
+                "user_id": user_id,
+                "amount": amount,
+                "method": "paypal",
+                "status": status,
+                "payment_details": {
+                    "paypal_email": f"user{user_id}@paypal.example.com",
+                    "gross_amount": amount,
+                    "transaction_fee": fee,
+                    "net_amount": round(amount - fee, 2),
+                    "paypal_batch_id": batch_id
+                },
+                "requested_at": requested_at,
+                "processed_at": min(requested_at + timedelta(hours=rng.uniform(0.1, 48)), self.now) if settled else None,
+                "transaction_id": batch_id,
+                "notes": "Synthetic payout failure" if status == "failed" else None,
+                "created_at": requested_at
+            })
+        return payouts
+
+def _reset_postgres_sequences(connection, tables):
+    with connection.begin():
+        for table in tables:
+            connection.exec_driver_sql(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {table}))"
+            )
+
+def rebuild_derived_tables():
+    """Counters and rollups are maintained incrementally by the app, so rebuild them after a bulk load"""
+    from platform_counters import rebuild_platform_counters
+    from revenue_rollups import backfill_revenue_rollups
+    from cache_versions import bump_catalogue_version
+
+    db = SessionLocal()
+    try:
+        counters = rebuild_platform_counters(db)
+        print(f"✅ Rebuilt {len(counters)} platform counters")
+        buckets = backfill_revenue_rollups(db)
+        print(f"✅ Backfilled {buckets} revenue buckets")
+        bump_catalogue_version(db)
+        db.commit()
+    finally:
+        db.close()
+
+def generate_dataset(volumes: Dict[str, int], batch_size: int = 20_000, days: int = 365,
+                     completion_rate: Optional[float] = None, seed: int = 42,
+                     rebuild_derived: bool = True) -> Dict[str, int]:
+    """Bulk-load a synthetic dataset and return the rows written per table"""
+    init_db()
+    started = time.perf_counter()
+
+    with engine.connect() as connection:
+        if connection.dialect.name == "sqlite":
+            # Bulk-load settings for this connection only
+            connection.exec_driver_sql("PRAGMA synchronous=OFF")
+            connection.exec_driver_sql("PRAGMA temp_store=MEMORY")
+            connection.exec_driver_sql("PRAGMA cache_size=-200000")
+            connection.commit()
+
+        writer = BulkWriter(connection, batch_size)
+        generator = DatasetGenerator(writer, volumes, days, completion_rate, seed)
+        print(f"🏗️  Generating {', '.join(f'{name}={count:,}' for name, count in volumes.items())} "
+              f"({writer.method}, batch {batch_size:,})")
+
+        if volumes["offers"]:
+            generator.generate_offers()
+        else:
+            generator.use_existing_offers()
+        generator.generate_users()
+
+        if connection.dialect.name == "postgresql":
+            _reset_postgres_sequences(connection, BulkWriter.TABLE_ORDER)
+        writer.report()
+        written = dict(writer.written)
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Wrote {sum(written.values()):,} rows in {elapsed:.1f}s")
+    print(f"   Generated users log in with password '{GENERATED_PASSWORD}'")
+
+    if rebuild_derived:
+        rebuild_derived_tables()
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed sample offers or bulk-generate a synthetic dataset")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("sample", help="Insert the hand-written sample offers (default)")
+
+    generate = subparsers.add_parser("generate", help="Bulk-generate users, offers, activity and payouts")
+    generate.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    for name in ("users", "offers", "user_offers", "earnings", "payouts"):
+        generate.add_argument(f"--{name.replace('_', '-')}", dest=name, type=int,
+                              help=f"Number of {name.replace('_', ' ')} (overrides the preset)")
+    generate.add_argument("--days", type=int, default=365, help="History window")
+    generate.add_argument("--completion-rate", type=float, help="Share of user offers completed (default 0.7)")
+    generate.add_argument("--batch-size", type=int, default=20_000, help="Rows per insert transaction")
+    generate.add_argument("--seed", type=int, default=42)
+    generate.add_argument("--skip-derived", action="store_true",
+                          help="Don't rebuild platform counters / revenue rollups afterwards")
+    args = parser.parse_args()
+
+    if args.command != "generate":
+        seed_offers()
+        return
+
+    volumes = {
+        name: getattr(args, name) if getattr(args, name) is not None else PRESETS[args.preset][name]
+        for name in ("users", "offers", "user_offers", "earnings", "payouts")
+    }
+    generate_dataset(volumes, batch_size=args.batch_size, days=args.days,
+                     completion_rate=args.completion_rate, seed=args.seed,
+                     rebuild_derived=not args.skip_derived)
+
 if __name__ == "__main__":
-    seed_offers()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Server-Timing breakdown
+Adds a Server-Timing header splitting each request into auth, db, upstream,
+serialization and template phases, plus an optional JSON log line per request.
+Modules mark sections with request_context.timed_phase(); SQL time comes from
+the cursor hooks in sql_stats.py.
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Dict
+from fastapi.templating import Jinja2Templates
+from starlette.datastructures import MutableHeaders
+import config  # noqa: F401 - loads .env
+from request_context import RequestStats, request_scope, route_template, timed_phase
+
+logger = logging.getLogger(__name__)
+
+# Server-Timing Configuration
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+SERVER_TIMING_LOG = os.getenv("SERVER_TIMING_LOG", "false").lower() == "true"
+
+# Header order
+PHASES = ("auth", "db", "upstream", "serialization", "template")
+
+def phase_durations(stats: RequestStats) -> Dict[str, float]:
+    """Milliseconds per phase recorded so far"""
+    durations = {}
+    for phase in PHASES:
+        seconds = stats.sql_seconds if phase == "db" else stats.phases.get(phase, 0.0)
+        if seconds:
+            durations[phase] = round(seconds * 1000, 2)
+    return durations
+
+def format_server_timing(stats: RequestStats, total_seconds: float) -> str:
+    """Server-Timing header value, e.g. auth;dur=1.2, db;dur=3.4;desc="5 queries", total;dur=9.8"""
+    entries = []
+    for phase, duration in phase_durations(stats).items():
+        entry = f"{phase};dur={duration}"
+        if phase == "db":
+            entry += f';desc="{stats.sql_count} queries"'
+        entries.append(entry)
+    entries.append(f"total;dur={round(total_seconds * 1000, 2)}")
+    return ", ".join(entries)
+
+class ServerTimingMiddleware:
+    """ASGI middleware adding the Server-Timing header (and log line) to every response"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (SERVER_TIMING_ENABLED or SERVER_TIMING_LOG):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_holder = {"status": 500}
+
+        with request_scope(scope) as stats:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    status_holder["status"] = message["status"]
+                    if SERVER_TIMING_ENABLED:
+                        headers = MutableHeaders(scope=message)
+                        headers.append("Server-Timing", format_server_timing(stats, time.perf_counter() - started))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if SERVER_TIMING_LOG:
+                    # Logged at the end, so streamed bodies are included
+                    logger.info(json.dumps({
+                        "method": scope["method"],
+                        "route": route_template(scope),
+                        "status": status_holder["status"],
+                        "total_ms": round((time.perf_counter() - started) * 1000, 2),
+                        "queries": stats.sql_count,
+                        **phase_durations(stats)
+                    }))
+
+class TimedJinja2Templates(Jinja2Templates):
+    """Jinja2Templates whose render time is reported as the template phase"""
+
+    def TemplateResponse(self, *args, **kwargs):
+        # Starlette renders the template in the response constructor
+        with timed_phase("template"):
+            return super().TemplateResponse(*args, **kwargs)
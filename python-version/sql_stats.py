@@ -0,0 +1,236 @@
+"""
+SQL query instrumentation
+SQLAlchemy cursor events time every statement, attribute it to the current
+request, log slow ones with normalized SQL and the application call site, and
+keep a per-process top-N table (GET /api/admin/sql-stats) so N+1 patterns
+show up as one call site with a huge count.
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
+from sqlalchemy import event
+import config  # noqa: F401 - loads .env
+from request_context import current_request, request_scope, route_template
+from metrics import db_statements, db_statement_duration
+
+logger = logging.getLogger(__name__)
+
+# SQL Stats Configuration
+SQL_STATS_ENABLED = os.getenv("SQL_STATS_ENABLED", "true").lower() == "true"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Requests running more statements than this are logged as a likely N+1
+SQL_REQUEST_STATEMENT_WARN = int(os.getenv("SQL_REQUEST_STATEMENT_WARN", "30"))
+SQL_STATS_MAX_ENTRIES = int(os.getenv("SQL_STATS_MAX_ENTRIES", "500"))
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|:\w+|\$\d+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement: str) -> str:
+    """Collapse literals, placeholders and IN-lists so equivalent statements group together"""
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(?+)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+_app_file_cache: Dict[str, bool] = {}
+
+def _is_app_file(filename: str) -> bool:
+    result = _app_file_cache.get(filename)
+    if result is None:
+        result = (
+            filename.startswith(APP_DIR)
+            and "site-packages" not in filename
+            and not filename.endswith(("sql_stats.py", "database.py"))
+        )
+        _app_file_cache[filename] = result
+    return result
+
+def call_site() -> str:
+    """Innermost application frame that issued the statement, e.g. offer_utils.py:142 complete_offer"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if _is_app_file(code.co_filename):
+            return f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+class QueryStats:
+    """Per-process aggregate by (normalized SQL, call site) and by route"""
+
+    def __init__(self, max_entries: int = SQL_STATS_MAX_ENTRIES):
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self._queries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._routes: Dict[str, Dict[str, Any]] = {}
+        self.dropped = 0
+
+    def record_query(self, sql: str, site: str, route: str, elapsed: float):
+        key = (sql, site)
+        with self._lock:
+            entry = self._queries.get(key)
+            if entry is None:
+                if len(self._queries) >= self.max_entries:
+                    self.dropped += 1
+                    return
+                entry = self._queries[key] = {
+                    "sql": sql,
+                    "call_site": site,
+                    "count": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                    "routes": set()
+                }
+            entry["count"] += 1
+            entry["total_seconds"] += elapsed
+            entry["max_seconds"] = max(entry["max_seconds"], elapsed)
+            entry["routes"].add(route)
+
+    def record_request(self, route: str, statements: int, seconds: float):
+        with self._lock:
+            stats = self._routes.setdefault(route, {
+                "requests": 0,
+                "statements": 0,
+                "max_statements": 0,
+                "sql_seconds": 0.0
+            })
+            stats["requests"] += 1
+            stats["statements"] += statements
+            stats["max_statements"] = max(stats["max_statements"], statements)
+            stats["sql_seconds"] += seconds
+
+    def top(self, limit: int = 20, order_by: str = "total") -> Dict[str, Any]:
+        sort_keys = {
+            "total": lambda entry: entry["total_seconds"],
+            "count": lambda entry: entry["count"],
+            "max": lambda entry: entry["max_seconds"]
+        }
+        sort_key = sort_keys.get(order_by, sort_keys["total"])
+
+        with self._lock:
+            entries = sorted(self._queries.values(), key=sort_key, reverse=True)[:limit]
+            queries = [{
+                "sql": entry["sql"],
+                "call_site": entry["call_site"],
+                "count": entry["count"],
+                "total_ms": round(entry["total_seconds"] * 1000, 3),
+                "mean_ms": round(entry["total_seconds"] * 1000 / entry["count"], 3),
+                "max_ms": round(entry["max_seconds"] * 1000, 3),
+                "routes": sorted(entry["routes"])
+            } for entry in entries]
+            routes = {
+                route: {
+                    **stats,
+                    "sql_seconds": round(stats["sql_seconds"], 6),
+                    "statements_per_request": round(stats["statements"] / stats["requests"], 2)
+                }
+                for route, stats in sorted(self._routes.items(),
+                                           key=lambda item: item[1]["statements"] / item[1]["requests"],
+                                           reverse=True)
+            }
+            dropped = self.dropped
+
+        return {
+            "enabled": SQL_STATS_ENABLED,
+            "slow_query_ms": SLOW_QUERY_MS,
+            "request_statement_warn": SQL_REQUEST_STATEMENT_WARN,
+            "order_by": order_by if order_by in sort_keys else "total",
+            "queries": queries,
+            "routes": routes,
+            "dropped_entries": dropped
+        }
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self._routes.clear()
+            self.dropped = 0
+
+query_stats = QueryStats()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    stats = current_request.get()
+
+    if stats is not None:
+        stats.sql_count += 1
+        stats.sql_seconds += elapsed
+        route = route_template(stats.scope)
+    else:
+        # Background jobs, scheduler, scripts
+        route = "background"
+        db_statements.inc(route)
+        db_statement_duration.inc(route, amount=elapsed)
+
+    if not SQL_STATS_ENABLED:
+        return
+
+    sql = normalize_sql(statement)
+    site = call_site()
+    query_stats.record_query(sql, site, route, elapsed)
+    if stats is not None:
+        stats.extra.setdefault("sql_call_sites", Counter())[site] += 1
+
+    elapsed_ms = elapsed * 1000
+    if elapsed_ms >= SLOW_QUERY_MS:
+        logger.warning("Slow query (%.1f ms) at %s [%s]: %s", elapsed_ms, site, route, sql)
+
+def instrument_engine(engine):
+    """Attach SQL timing hooks to an engine (idempotent)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+class SQLStatsMiddleware:
+    """ASGI middleware recording statements per request and flagging likely N+1 routes"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not SQL_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        with request_scope(scope) as stats:
+            # Statements an outer middleware already counted are not ours
+            count_before, seconds_before = stats.sql_count, stats.sql_seconds
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                statements = stats.sql_count - count_before
+                seconds = stats.sql_seconds - seconds_before
+                route = route_template(scope)
+                query_stats.record_request(route, statements, seconds)
+                if statements > SQL_REQUEST_STATEMENT_WARN:
+                    self._warn_n_plus_one(scope["method"], route, statements, seconds, stats.extra)
+
+    @staticmethod
+    def _warn_n_plus_one(method: str, route: str, statements: int, seconds: float,
+                         extra: Dict[str, Any]):
+        call_sites: Optional[Counter] = extra.get("sql_call_sites")
+        hottest = ""
+        if call_sites:
+            site, count = call_sites.most_common(1)[0]
+            hottest = f"; most repeated: {site} x{count}"
+        logger.warning(
+            "%s %s ran %d SQL statements (%.1f ms) - possible N+1%s",
+            method, route, statements, seconds * 1000, hottest
+        )
@@ -1,31 +1,103 @@
 #!/usr/bin/env python3
 """
 Startup script for OfferEarner application
+
+    python start.py                 # development: one worker, RELOAD=true for auto-reload
+    python start.py --production    # or SERVER_MODE=production
+
+Production mode runs one worker per CPU core (WEB_CONCURRENCY overrides) on
+uvloop + httptools when installed, with a larger listen backlog, keep-alive
+longer than the proxy's idle timeout and a bounded graceful drain on SIGTERM.
+Each worker warms itself up in the app lifespan before accepting connections
+(see warmup.py).
 """
 
-import uvicorn
 import os
-from dotenv import load_dotenv
+import sys
+import argparse
+import importlib.util
+import uvicorn
+import config  # noqa: F401 - loads .env
 
-# Load environment variables
-load_dotenv()
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8001"))
+SERVER_MODE = os.getenv("SERVER_MODE", "development")  # 'development' or 'production'
 
-if __name__ == "__main__":
-    # Get configuration from environment or use defaults
-    host = os.getenv("HOST", "0.0.0.0")
-    port = int(os.getenv("PORT", "8001"))
-    reload = os.getenv("RELOAD", "false").lower() == "true"
-    
-    print(f"Starting OfferEarner on {host}:{port}")
-    print(f"Reload mode: {reload}")
-    
+# Production Server Configuration
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0"))  # workers; 0 = one per CPU core
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+# Keep idle connections open longer than the proxy in front (nginx / Cloudflare), so it never reuses a closed one
+KEEP_ALIVE_TIMEOUT = int(os.getenv("KEEP_ALIVE_TIMEOUT", "75"))
+# Seconds in-flight requests get to finish after SIGTERM
+GRACEFUL_SHUTDOWN_TIMEOUT = int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "30"))
+
+def cpu_count() -> int:
+    """Cores this process may run on (respects CPU affinity / container cpusets)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def fastest_available(module: str, fallback: str) -> str:
+    """The optional accelerated implementation if installed, else the pure-Python one"""
+    return module if importlib.util.find_spec(module) else fallback
+
+def preflight():
+    """
+    Import the app and set up the schema once in the supervisor, before any worker is spawned
+    A broken deploy fails here, and workers don't race each other creating tables.
+    """
+    import main  # noqa: F401
+    from database import init_db, DB_AUTO_CREATE_SCHEMA
+
+    if DB_AUTO_CREATE_SCHEMA:
+        init_db()
+        # Inherited by the worker processes
+        os.environ["DB_AUTO_CREATE_SCHEMA"] = "false"
+
+def production_options() -> dict:
+    workers = WEB_CONCURRENCY or cpu_count()
+    return {
+        "workers": workers,
+        "loop": fastest_available("uvloop", "asyncio"),
+        "http": fastest_available("httptools", "h11"),
+        "backlog": SERVER_BACKLOG,
+        "timeout_keep_alive": KEEP_ALIVE_TIMEOUT,
+        "timeout_graceful_shutdown": GRACEFUL_SHUTDOWN_TIMEOUT,
+        "lifespan": "on"
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the OfferEarner server")
+    parser.add_argument("--production", action="store_true", help="Multi-worker production mode")
+    args = parser.parse_args()
+    production = args.production or SERVER_MODE == "production"
+
+    if production:
+        # Inherited by the workers (page cache and template settings read it)
+        os.environ["SERVER_MODE"] = "production"
+        options = production_options()
+        preflight()
+        print(f"Starting OfferEarner on {HOST}:{PORT} (production)")
+        print(f"Workers: {options['workers']}, loop: {options['loop']}, http: {options['http']}, "
+              f"backlog: {options['backlog']}, keep-alive: {options['timeout_keep_alive']}s")
+    else:
+        reload = os.getenv("RELOAD", "false").lower() == "true"
+        options = {"reload": reload}
+        print(f"Starting OfferEarner on {HOST}:{PORT}")
+        print(f"Reload mode: {reload}")
+
+    sys.stdout.flush()
     uvicorn.run(
         "main:app",
-        host=host,
-        port=port,
-        reload=reload,
+        host=HOST,
+        port=PORT,
         log_level="info",
         # Handle HTTPS behind Cloudflare
         proxy_headers=True,
-        forwarded_allow_ips="*"
+        forwarded_allow_ips="*",
+        **options
     )
+
+if __name__ == "__main__":
+    main()
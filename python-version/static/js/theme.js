@@ -189,6 +189,50 @@ const utils = {
             this.showNotification(error.message || 'Request failed. Please try again.', 'error');
             throw error;
         }
+    },
+
+    // Live updates from /api/events (server-sent events), for signed-in users.
+    // fetch() rather than EventSource so the token goes in the Authorization header, not the URL.
+    // onEvent(type, data) gets each event; onReconnect() runs before reconnecting, to catch up.
+    async watchLiveEvents(onEvent, onReconnect) {
+        let retryMs = 5000;
+        while (auth.isAuthenticated()) {
+            try {
+                const response = await fetch('/api/events', {
+                    headers: { 'Authorization': `Bearer ${auth.getToken()}` }
+                });
+                if (!response.ok) {
+                    return;  // signed out or disabled on this server
+                }
+
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, { stream: true });
+
+                    // Events are separated by a blank line
+                    let end;
+                    while ((end = buffer.indexOf('\n\n')) !== -1) {
+                        const frame = buffer.slice(0, end);
+                        buffer = buffer.slice(end + 2);
+                        let type = 'message', data = '';
+                        frame.split('\n').forEach(line => {
+                            if (line.startsWith('event: ')) type = line.slice(7);
+                            else if (line.startsWith('data: ')) data += line.slice(6);
+                            else if (line.startsWith('retry: ')) retryMs = parseInt(line.slice(7), 10) || retryMs;
+                        });
+                        if (data) onEvent(type, JSON.parse(data));
+                    }
+                }
+            } catch (error) {
+                console.error('Live updates disconnected:', error);
+            }
+            await new Promise(resolve => setTimeout(resolve, retryMs));
+            if (onReconnect) await onReconnect();
+        }
     }
 };
 
@@ -0,0 +1,90 @@
+"""
+Fingerprinted, precompressed static assets
+build_assets.py writes content-hashed copies of static files (plus .gz / .br variants)
+to static/dist with a manifest; templates resolve names through asset_url()
+"""
+
+import os
+import json
+from typing import Dict, Optional
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+
+STATIC_DIR = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"))
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+
+STATIC_URL_PREFIX = "/static/"
+DIST_URL_PREFIX = "/static/dist/"
+
+# Fingerprinted files never change, so they can be cached forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=300"
+
+# Preferred encoding first
+PRECOMPRESSED_VARIANTS = (("br", ".br"), ("gzip", ".gz"))
+
+_manifest: Optional[Dict[str, str]] = None
+
+def load_manifest() -> Dict[str, str]:
+    """Source path -> fingerprinted path, read once per process"""
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(MANIFEST_PATH) as manifest_file:
+                _manifest = json.load(manifest_file)
+        except (OSError, ValueError):
+            # Assets not built - serve the source files
+            _manifest = {}
+    return _manifest
+
+def asset_url(path: str) -> str:
+    """URL for a static asset, fingerprinted when the build step has run"""
+    path = path.lstrip("/")
+    fingerprinted = load_manifest().get(path)
+    if fingerprinted:
+        return DIST_URL_PREFIX + fingerprinted
+    return STATIC_URL_PREFIX + path
+
+def _accepted_encodings(scope) -> set:
+    accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+    encodings = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves .br / .gz siblings when the client accepts them"""
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        full_path = str(full_path)
+        encoding = None
+        accepted = _accepted_encodings(scope)
+
+        for name, suffix in PRECOMPRESSED_VARIANTS:
+            if name in accepted:
+                try:
+                    variant_stat = os.stat(full_path + suffix)
+                except OSError:
+                    continue
+                if variant_stat.st_mtime < stat_result.st_mtime:
+                    # Source edited since the last build - don't serve a stale variant
+                    continue
+                full_path, stat_result, encoding = full_path + suffix, variant_stat, name
+                break
+
+        # Media type is guessed from e.g. style.css.br -> text/css
+        response = super().file_response(full_path, stat_result, scope, status_code)
+
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.headers["Vary"] = "Accept-Encoding"
+        if full_path.startswith(DIST_DIR + os.sep):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["Cache-Control"] = DEFAULT_CACHE_CONTROL
+        return response
@@ -0,0 +1,222 @@
+"""
+Background jobs for long-running admin operations
+Jobs run on a worker pool and report progress through the background_jobs table,
+so any uvicorn worker can answer a status poll. Each queued / running job holds a
+lease ("job:<id>" in sync_leases) renewed by a heartbeat thread; a job whose lease
+has expired belonged to a worker that died, and is marked failed.
+"""
+
+import os
+import uuid
+import socket
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable
+from datetime import datetime
+from database import SessionLocal, BackgroundJob, SyncLease
+from lootably_integration import sync_lootably_offers
+from sync_scheduler import SYNC_LEASE_NAME, SYNC_LEASE_SECONDS, acquire_lease, lease_renewer, release_lease
+import config  # noqa: F401 - loads .env
+
+# Job Configuration
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Job lease TTL, renewed every third of it; a killed worker's jobs count as dead after this long
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+JOB_KIND_LOOTABLY_SYNC = "lootably_sync"
+JOB_KIND_DEMO_OFFERS = "demo_offers"
+
+logger = logging.getLogger(__name__)
+
+ORPHANED_JOB_ERROR = "Worker stopped before the job finished"
+
+JOB_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+class JobSkipped(Exception):
+    """The job did not run, e.g. because the same work is already running elsewhere"""
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+
+def _empty_progress() -> Dict[str, Any]:
+    return {"fetched": 0, "upserted": 0, "deactivated": 0, "elapsed": 0.0}
+
+def _update_job(job_id: str, **fields):
+    """Write job fields in a short transaction of their own"""
+    db = SessionLocal()
+    try:
+        db.query(BackgroundJob).filter(BackgroundJob.id == job_id).update(
+            fields, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+def _job_lease(job_id: str) -> str:
+    return f"job:{job_id}"
+
+def _job_alive(db, job_id: str) -> bool:
+    """True while the worker running the job keeps renewing its lease"""
+    return db.query(SyncLease.name).filter(
+        SyncLease.name == _job_lease(job_id),
+        SyncLease.expires_at > datetime.utcnow()
+    ).first() is not None
+
+def _heartbeat(job_id: str, stop: threading.Event):
+    while not stop.wait(JOB_LEASE_SECONDS / 3):
+        try:
+            acquire_lease(_job_lease(job_id), JOB_OWNER, JOB_LEASE_SECONDS)
+        except Exception as e:
+            logger.warning("Job %s heartbeat failed: %s", job_id, e)
+
+def _drop_job_lease(job_id: str):
+    db = SessionLocal()
+    try:
+        db.query(SyncLease).filter(SyncLease.name == _job_lease(job_id)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+def _run_job(job_id: str, work: Callable[[Any, Callable[[Dict[str, int]], None]], Dict[str, Any]]):
+    """Execute a job body, recording progress and the final outcome"""
+    stop = threading.Event()
+    threading.Thread(target=_heartbeat, args=(job_id, stop), name=f"job-heartbeat-{job_id[:8]}", daemon=True).start()
+    try:
+        _execute_job(job_id, work)
+    finally:
+        stop.set()
+        _drop_job_lease(job_id)
+
+def _execute_job(job_id: str, work: Callable[[Any, Callable[[Dict[str, int]], None]], Dict[str, Any]]):
+    started = time.perf_counter()
+    _update_job(job_id, status="running", started_at=datetime.utcnow())
+
+    def report(counts: Dict[str, int]):
+        _update_job(job_id, progress={
+            "fetched": counts.get("fetched", 0),
+            "upserted": counts.get("created", 0) + counts.get("updated", 0),
+            "deactivated": counts.get("deactivated", 0),
+            "elapsed": round(time.perf_counter() - started, 3)
+        })
+
+    db = SessionLocal()
+    try:
+        result = work(db, report)
+        report(result)
+        _update_job(job_id, status="completed", result=result, finished_at=datetime.utcnow())
+        logger.info("Job %s completed: %s", job_id, result)
+    except JobSkipped as e:
+        _update_job(job_id, status="skipped", error=str(e), finished_at=datetime.utcnow())
+        logger.info("Job %s skipped: %s", job_id, e)
+    except Exception as e:
+        db.rollback()
+        _update_job(job_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+        logger.error("Job %s failed: %s", job_id, e)
+    finally:
+        db.close()
+
+def submit_job(kind: str, work: Callable) -> Dict[str, Any]:
+    """
+    Queue a job on the worker pool and return immediately
+    If a live job of the same kind is already queued or running, that job is returned instead
+    """
+    fail_orphaned_jobs(kind)
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        active_job = db.query(BackgroundJob).filter(
+            BackgroundJob.kind == kind,
+            BackgroundJob.status.in_(["queued", "running"])
+        ).first()
+        if active_job:
+            return {"job_id": active_job.id, "status": active_job.status, "already_running": True}
+
+        job_id = uuid.uuid4().hex
+        # Held from before the row exists, so the queued job never looks orphaned
+        acquire_lease(_job_lease(job_id), JOB_OWNER, JOB_LEASE_SECONDS)
+        job = BackgroundJob(
+            id=job_id,
+            kind=kind,
+            status="queued",
+            progress=_empty_progress(),
+            submitted_at=now
+        )
+        db.add(job)
+        db.commit()
+    finally:
+        db.close()
+
+    _executor.submit(_run_job, job_id, work)
+    return {"job_id": job_id, "status": "queued", "already_running": False}
+
+def fail_orphaned_jobs(kind: Optional[str] = None) -> int:
+    """
+    Mark queued / running jobs whose lease has expired (their worker died) as failed
+    Safe with several workers: jobs still running elsewhere keep renewing their lease
+    Returns the number of jobs marked failed
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(BackgroundJob).filter(BackgroundJob.status.in_(["queued", "running"]))
+        if kind:
+            query = query.filter(BackgroundJob.kind == kind)
+        orphaned = [job for job in query if not _job_alive(db, job.id)]
+        for job in orphaned:
+            job.status = "failed"
+            job.error = ORPHANED_JOB_ERROR
+            job.finished_at = datetime.utcnow()
+            logger.warning("Job %s (%s) was orphaned by a stopped worker - marked failed", job.id, job.kind)
+        db.commit()
+        return len(orphaned)
+    finally:
+        db.close()
+
+def _lootably_sync_work(db, report) -> Dict[str, Any]:
+    # Same lease as the scheduler, so a manual sync never overlaps a scheduled one on any worker
+    owner = f"{socket.gethostname()}:{os.getpid()}:job-{uuid.uuid4().hex[:8]}"
+    if not acquire_lease(SYNC_LEASE_NAME, owner, SYNC_LEASE_SECONDS):
+        raise JobSkipped("A Lootably sync is already running")
+    try:
+        return sync_lootably_offers(db, progress=lease_renewer(SYNC_LEASE_NAME, owner, SYNC_LEASE_SECONDS, report))
+    finally:
+        release_lease(SYNC_LEASE_NAME, owner)
+
+def _demo_offers_work(db, report) -> Dict[str, Any]:
+    from demo_lootably import create_demo_lootably_offers
+    created_count = create_demo_lootably_offers(db)
+    return {"fetched": created_count, "created": created_count, "synced": created_count}
+
+def submit_lootably_sync_job() -> Dict[str, Any]:
+    """Queue a Lootably catalogue sync"""
+    return submit_job(JOB_KIND_LOOTABLY_SYNC, _lootably_sync_work)
+
+def submit_demo_offers_job() -> Dict[str, Any]:
+    """Queue creation of the demo Lootably offers"""
+    return submit_job(JOB_KIND_DEMO_OFFERS, _demo_offers_work)
+
+def get_job_status(job_id: str) -> Optional[Dict[str, Any]]:
+    """Get a job's status and progress, or None if it does not exist"""
+    db = SessionLocal()
+    try:
+        job = db.query(BackgroundJob).filter(BackgroundJob.id == job_id).first()
+        if not job:
+            return None
+
+        return {
+            "job_id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "progress": job.progress or _empty_progress(),
+            "result": job.result,
+            "error": job.error,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None
+        }
+    finally:
+        db.close()
+
+def shutdown_job_pool():
+    """Stop accepting jobs; running jobs are left to finish"""
+    _executor.shutdown(wait=False)
@@ -0,0 +1,248 @@
+"""
+In-process scheduler for periodic Lootably offer syncs
+Runs syncs on a background thread so no HTTP worker is blocked
+"""
+
+import os
+import random
+import socket
+import logging
+import threading
+import time
+from typing import Callable, Dict, Any, Optional
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from database import SessionLocal, SyncLease
+from lootably_integration import sync_lootably_offers
+import config  # noqa: F401 - loads .env
+
+# Scheduler Configuration
+SYNC_SCHEDULER_ENABLED = os.getenv("SYNC_SCHEDULER_ENABLED", "false").lower() == "true"
+SYNC_INTERVAL_SECONDS = int(os.getenv("SYNC_INTERVAL_SECONDS", "900"))  # 15 minutes
+SYNC_JITTER_SECONDS = int(os.getenv("SYNC_JITTER_SECONDS", "120"))
+# Renewed while a sync runs; a sync that can't renew it (another worker took it over) is rolled back
+SYNC_LEASE_SECONDS = int(os.getenv("SYNC_LEASE_SECONDS", "600"))
+
+SYNC_LEASE_NAME = "lootably_sync"
+
+logger = logging.getLogger(__name__)
+
+def acquire_lease(name: str, owner: str, ttl_seconds: int) -> bool:
+    """
+    Try to take (or renew) a named lease in the database
+    Only one uvicorn worker across all hosts can hold a lease at a time
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+
+        # Take the lease over if it has expired or we already hold it
+        updated = db.query(SyncLease).filter(
+            SyncLease.name == name,
+            (SyncLease.expires_at < now) | (SyncLease.owner == owner)
+        ).update({
+            SyncLease.owner: owner,
+            SyncLease.expires_at: expires_at,
+            SyncLease.acquired_at: now
+        }, synchronize_session=False)
+
+        if updated:
+            db.commit()
+            return True
+
+        if db.query(SyncLease).filter(SyncLease.name == name).first():
+            # Held by another worker
+            db.rollback()
+            return False
+
+        # First run ever - create the lease row
+        db.add(SyncLease(name=name, owner=owner, expires_at=expires_at, acquired_at=now))
+        try:
+            db.commit()
+            return True
+        except IntegrityError:
+            # Another worker created it first
+            db.rollback()
+            return False
+    finally:
+        db.close()
+
+class LeaseLost(RuntimeError):
+    """The lease expired and another worker took it over"""
+
+def lease_renewer(name: str, owner: str, ttl_seconds: int,
+                  progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Callable[[Dict[str, int]], None]:
+    """
+    Progress callback for sync_lootably_offers that renews the lease every third of its TTL
+    Raises LeaseLost instead of letting the sync commit when the lease is no longer ours.
+    """
+    renew_every = ttl_seconds / 3
+    last_renewed = time.monotonic()
+
+    def renew(counts: Dict[str, int]):
+        nonlocal last_renewed
+        if time.monotonic() - last_renewed >= renew_every:
+            if not acquire_lease(name, owner, ttl_seconds):
+                raise LeaseLost(f"Lease {name!r} was taken over by another worker")
+            last_renewed = time.monotonic()
+        if progress:
+            progress(counts)
+
+    return renew
+
+def release_lease(name: str, owner: str):
+    """Release a lease we hold so the next run is not delayed by the TTL"""
+    db = SessionLocal()
+    try:
+        db.query(SyncLease).filter(
+            SyncLease.name == name,
+            SyncLease.owner == owner
+        ).update({SyncLease.expires_at: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+class SyncScheduler:
+    """Runs Lootably syncs periodically on a daemon thread"""
+
+    def __init__(self,
+                 interval_seconds: int = SYNC_INTERVAL_SECONDS,
+                 jitter_seconds: int = SYNC_JITTER_SECONDS,
+                 lease_seconds: int = SYNC_LEASE_SECONDS):
+        self.interval_seconds = interval_seconds
+        self.jitter_seconds = jitter_seconds
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+        # Single-run lock: a sync never overlaps another one in this process
+        self._run_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Last run statistics
+        self.last_run_started_at: Optional[datetime] = None
+        self.last_run_duration: Optional[float] = None
+        self.last_run_counts: Dict[str, int] = {}
+        self.last_run_error: Optional[str] = None
+        self.last_skip_reason: Optional[str] = None
+        self.total_runs = 0
+
+    def start(self):
+        """Start the scheduler thread"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._loop,
+            name="lootably-sync-scheduler",
+            daemon=True
+        )
+        self._thread.start()
+        logger.info("Sync scheduler started (every %ss ±%ss)", self.interval_seconds, self.jitter_seconds)
+
+    def stop(self, timeout: float = 5.0):
+        """Signal the scheduler thread to stop and wait briefly for it"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        logger.info("Sync scheduler stopped")
+
+    def _next_delay(self) -> float:
+        """Interval with random jitter so workers don't wake up in lockstep"""
+        jitter = random.uniform(-self.jitter_seconds, self.jitter_seconds)
+        return max(1.0, self.interval_seconds + jitter)
+
+    def _loop(self):
+        # Initial jitter spreads the first run of freshly started workers
+        delay = random.uniform(0, self.jitter_seconds)
+        while not self._stop_event.wait(delay):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error("Scheduled sync failed: %s", e)
+            delay = self._next_delay()
+
+    def run_once(self) -> bool:
+        """
+        Run a single sync if no other run is in progress
+        Returns True if a sync was performed
+        """
+        if not self._run_lock.acquire(blocking=False):
+            self.last_skip_reason = "sync already running in this process"
+            return False
+
+        try:
+            if not acquire_lease(SYNC_LEASE_NAME, self.owner, self.lease_seconds):
+                self.last_skip_reason = "lease held by another worker"
+                return False
+
+            self.last_skip_reason = None
+            self.last_run_started_at = datetime.utcnow()
+            started = time.perf_counter()
+            db = SessionLocal()
+            try:
+                self.last_run_counts = sync_lootably_offers(
+                    db, progress=lease_renewer(SYNC_LEASE_NAME, self.owner, self.lease_seconds)
+                )
+                self.last_run_error = None
+            except Exception as e:
+                db.rollback()
+                self.last_run_error = str(e)
+                raise
+            finally:
+                db.close()
+                self.last_run_duration = round(time.perf_counter() - started, 3)
+                self.total_runs += 1
+                release_lease(SYNC_LEASE_NAME, self.owner)
+                if self.last_run_duration > self.lease_seconds:
+                    logger.warning("Sync took %ss, longer than SYNC_LEASE_SECONDS (%ss)",
+                                   self.last_run_duration, self.lease_seconds)
+
+            logger.info("Scheduled sync finished in %ss: %s", self.last_run_duration, self.last_run_counts)
+            return True
+        finally:
+            self._run_lock.release()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Scheduler state and last-run statistics"""
+        return {
+            "enabled": True,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "owner": self.owner,
+            "interval_seconds": self.interval_seconds,
+            "jitter_seconds": self.jitter_seconds,
+            "total_runs": self.total_runs,
+            "last_run_started_at": self.last_run_started_at.isoformat() if self.last_run_started_at else None,
+            "last_run_duration": self.last_run_duration,
+            "last_run_counts": self.last_run_counts,
+            "last_run_error": self.last_run_error,
+            "last_skip_reason": self.last_skip_reason
+        }
+
+# Process-wide scheduler instance (None when disabled)
+sync_scheduler: Optional[SyncScheduler] = None
+
+def start_sync_scheduler() -> Optional[SyncScheduler]:
+    """Start the scheduler if SYNC_SCHEDULER_ENABLED is set"""
+    global sync_scheduler
+
+    if not SYNC_SCHEDULER_ENABLED:
+        return None
+
+    if sync_scheduler is None:
+        sync_scheduler = SyncScheduler()
+    sync_scheduler.start()
+    return sync_scheduler
+
+def stop_sync_scheduler():
+    """Stop the scheduler if it was started"""
+    if sync_scheduler is not None:
+        sync_scheduler.stop()
+
+def get_sync_scheduler_status() -> Dict[str, Any]:
+    """Status for the admin endpoint"""
+    if sync_scheduler is None:
+        return {"enabled": False}
+    return sync_scheduler.get_status()
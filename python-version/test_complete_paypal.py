@@ -160,8 +160,10 @@ def test_complete_paypal_flow():
                     
                     print(f"  {status_emoji} ${payout['amount']:.2f} - {payout['status'].title()} - {payout['method'].title()}")
                     
-                    if payout['payment_details']:
-                        details = payout['payment_details']
+                    # Payment details are loaded per payout
+                    detail_response = requests.get(f"{BASE_URL}/api/payouts/{payout['id']}", headers=headers)
+                    details = detail_response.json()['payout']['payment_details'] if detail_response.status_code == 200 else None
+                    if details:
                         if 'paypal_batch_id' in details:
                             print(f"     📦 Batch ID: {details['paypal_batch_id']}")
                         if 'transaction_fee_actual' in details:
@@ -0,0 +1,50 @@
+"""
+Shared fixtures: a throwaway SQLite database for the test session
+DATABASE_URL is set before any app module is imported.
+
+    cd python-version && python -m pytest -q tests
+"""
+
+import os
+import sys
+import tempfile
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='offerearner-tests-'), 'test.db')}"
+os.environ["DB_AUTO_CREATE_SCHEMA"] = "false"
+
+from database import Base, engine, SessionLocal, User, Offer  # noqa: E402
+
+@pytest.fixture
+def db():
+    """Session on an empty schema; tables are dropped after each test"""
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def user(db):
+    user = User(username="tester", email="tester@example.com", hashed_password="x",
+                paypal_email="tester@paypal.example.com")
+    db.add(user)
+    db.commit()
+    return user
+
+@pytest.fixture
+def make_offer(db):
+    """Factory for active offers: make_offer(title=..., reward_amount=...)"""
+    def make(title: str = "Offer", reward_amount: float = 2.0, **fields) -> Offer:
+        fields = {"description": title, "provider": "lootably", "category": "survey",
+                  "user_payout": reward_amount / 2, **fields}
+        offer = Offer(title=title, reward_amount=reward_amount, **fields)
+        db.add(offer)
+        db.commit()
+        return offer
+    return make
@@ -0,0 +1,44 @@
+import asyncio
+import pytest
+from compression import CompressionMiddleware
+
+SCOPE = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+
+async def start(send):
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", b"2048")]})
+
+def run(app, sent):
+    """Call the app through the middleware, collecting the messages sent to the server"""
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(CompressionMiddleware(app)(dict(SCOPE), receive, send))
+
+def assert_empty_response(sent):
+    assert [message["type"] for message in sent] == ["http.response.start", "http.response.body"]
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-length"] == b"0"
+    assert b"content-encoding" not in headers
+    assert sent[1]["body"] == b""
+
+def test_start_without_body_is_sent_as_empty_response():
+    async def app(scope, receive, send):
+        await start(send)
+
+    sent = []
+    run(app, sent)
+    assert_empty_response(sent)
+
+def test_start_is_sent_when_the_app_raises_before_the_body():
+    async def app(scope, receive, send):
+        await start(send)
+        raise RuntimeError("boom")
+
+    sent = []
+    with pytest.raises(RuntimeError):
+        run(app, sent)
+    assert_empty_response(sent)
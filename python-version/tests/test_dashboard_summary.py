@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from database import SessionLocal, UserOffer, engine
+from dashboard_summary import build_dashboard_summary, get_dashboard_summary
+from offer_utils import complete_offer
+from request_context import request_scope
+from sql_stats import instrument_engine
+
+def dashboard_statements(user_id: int) -> int:
+    """Statements run to build the summary, in a fresh session so nothing comes from the identity map"""
+    instrument_engine(engine)
+    with SessionLocal() as session, request_scope({"type": "http"}) as stats:
+        summary = build_dashboard_summary(session, user_id)
+        assert all(entry["offer"]["title"] for entry in summary.recent_offers)
+        return stats.sql_count
+
+def start_offers(db, user, make_offer, count: int):
+    for index in range(count):
+        offer = make_offer(title=f"Offer {index}")
+        db.add(UserOffer(user_id=user.id, offer_id=offer.id, status="started"))
+    db.commit()
+
+def test_statement_count_does_not_grow_with_recent_offers(db, user, make_offer):
+    start_offers(db, user, make_offer, 1)
+    one_offer = dashboard_statements(user.id)
+
+    start_offers(db, user, make_offer, 7)
+    eight_offers = dashboard_statements(user.id)
+
+    assert one_offer == eight_offers == 3
+
+def test_completion_builds_missing_summary_before_a_stale_dashboard_read(db, user, make_offer):
+    offer = make_offer()
+    db.add(UserOffer(user_id=user.id, offer_id=offer.id, status="started"))
+    db.commit()
+
+    # A dashboard read builds its row from before the completion...
+    with SessionLocal() as reader:
+        stale = build_dashboard_summary(reader, user.id)
+        assert stale.pending_offers == 1
+
+        complete_offer(db, user.id, offer.id)
+
+        # ...and can no longer store it afterwards
+        reader.add(stale)
+        with pytest.raises(IntegrityError):
+            reader.commit()
+
+    db.expire_all()
+    summary = get_dashboard_summary(db, user.id)
+    assert summary.pending_offers == 0
+    assert len(summary.recent_earnings) == 1
+    assert summary.recent_offers[0]["status"] == "completed"
@@ -0,0 +1,20 @@
+from database import Earning
+from earnings_history import get_user_earnings_page
+
+def test_cursor_pages_reach_the_end_over_server_default_timestamps(db, user):
+    # Rows written by the column default: SQLite stores 'YYYY-MM-DD HH:MM:SS'
+    for index in range(5):
+        db.add(Earning(user_id=user.id, amount=1.0, type="bonus", description=f"Bonus {index}"))
+    db.commit()
+    expected = sorted((earning.id for earning in db.query(Earning)), reverse=True)
+
+    seen, cursor = [], None
+    for _ in range(len(expected)):
+        page = get_user_earnings_page(db, user.id, cursor=cursor, limit=2)
+        seen += [earning["id"] for earning in page["earnings"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert cursor is None
+    assert seen == expected
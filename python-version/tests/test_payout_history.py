@@ -0,0 +1,25 @@
+import pytest
+from database import Payout
+from paypal_integration import get_user_payout_history
+
+def test_cursor_pages_reach_the_end_over_server_default_timestamps(db, user):
+    # Rows written before created_at was set explicitly: SQLite stores 'YYYY-MM-DD HH:MM:SS'
+    for _ in range(5):
+        db.add(Payout(user_id=user.id, amount=5.0, method="paypal", status="completed"))
+    db.commit()
+    expected = sorted((payout.id for payout in db.query(Payout)), reverse=True)
+
+    seen, cursor = [], None
+    for _ in range(len(expected)):
+        page = get_user_payout_history(db, user.id, cursor=cursor, limit=2)
+        seen += [payout["id"] for payout in page["payouts"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert cursor is None
+    assert seen == expected
+
+def test_invalid_cursor_is_rejected(db, user):
+    with pytest.raises(ValueError):
+        get_user_payout_history(db, user.id, cursor="not-a-cursor")
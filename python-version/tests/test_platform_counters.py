@@ -0,0 +1,17 @@
+from database import PlatformCounter, Payout
+from cache_versions import bump_catalogue_version, get_catalogue_version
+from platform_counters import rebuild_platform_counters, get_counters, payout_count_counter
+
+def test_rebuild_keeps_the_catalogue_version(db, user):
+    for _ in range(3):
+        bump_catalogue_version(db)
+    db.add(PlatformCounter(name=payout_count_counter("stale"), value=4.0))
+    db.add(Payout(user_id=user.id, amount=5.0, method="paypal", status="completed"))
+    db.commit()
+
+    rebuild_platform_counters(db)
+
+    assert get_catalogue_version(db) == 3
+    counters = get_counters(db)
+    assert payout_count_counter("stale") not in counters
+    assert counters[payout_count_counter("completed")] == 1
@@ -0,0 +1,23 @@
+from database import RevenueRollup
+from offer_utils import complete_offer
+from revenue_rollups import backfill_revenue_rollups
+
+def rollup_rows(db):
+    return sorted(
+        (row.day, row.provider, row.category, row.completions,
+         round(row.user_payout, 2), round(row.provider_revenue, 2), round(row.platform_margin, 2))
+        for row in db.query(RevenueRollup)
+    )
+
+def test_backfill_matches_incremental_rollups(db, user, make_offer):
+    survey = make_offer(title="Survey", reward_amount=2.0)
+    app = make_offer(title="App", reward_amount=5.0, category="app")
+    complete_offer(db, user.id, survey.id)
+    complete_offer(db, user.id, app.id)
+    # A repeated completion is a second earning, and counts twice in both paths
+    complete_offer(db, user.id, app.id)
+    incremental = rollup_rows(db)
+
+    assert backfill_revenue_rollups(db) == 2
+    assert rollup_rows(db) == incremental
+    assert [row[3] for row in incremental] == [2, 1]
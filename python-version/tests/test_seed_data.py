@@ -0,0 +1,16 @@
+from database import Offer
+from cache_versions import get_catalogue_version, make_etag
+from seed_data import seed_offers
+
+def offers_etag(db) -> str:
+    # As built by GET /api/offers with no filters
+    return make_etag("offers", get_catalogue_version(db), "", "")
+
+def test_seeding_offers_changes_the_offers_etag(db):
+    before = offers_etag(db)
+
+    seed_offers()
+
+    db.expire_all()
+    assert db.query(Offer).count() > 0
+    assert offers_etag(db) != before
@@ -0,0 +1,33 @@
+import pytest
+from database import UserOffer
+from dashboard_summary import get_dashboard_summary
+from offer_utils import start_offer
+
+def test_start_counts_as_pending_in_an_existing_summary(db, user, make_offer):
+    first, second = make_offer(title="First"), make_offer(title="Second")
+    start_offer(db, user.id, first.id)
+    assert get_dashboard_summary(db, user.id).pending_offers == 1
+
+    start_offer(db, user.id, second.id)
+
+    summary = get_dashboard_summary(db, user.id)
+    assert summary.pending_offers == 2
+    assert [entry["offer"]["title"] for entry in summary.recent_offers] == ["Second", "First"]
+
+def test_duplicate_start_returns_the_same_row(db, user, make_offer):
+    offer = make_offer()
+    get_dashboard_summary(db, user.id)
+
+    first = start_offer(db, user.id, offer.id)
+    again = start_offer(db, user.id, offer.id)
+
+    assert again.id == first.id
+    assert db.query(UserOffer).filter(UserOffer.user_id == user.id).count() == 1
+    assert get_dashboard_summary(db, user.id).pending_offers == 1
+
+def test_inactive_offer_cannot_be_started(db, user, make_offer):
+    offer = make_offer(is_active=False)
+
+    with pytest.raises(ValueError, match="Offer not found"):
+        start_offer(db, user.id, offer.id)
+    assert db.query(UserOffer).count() == 0
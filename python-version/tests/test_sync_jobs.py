@@ -0,0 +1,47 @@
+import time
+from datetime import datetime
+from database import BackgroundJob
+from sync_jobs import submit_job, get_job_status, fail_orphaned_jobs, ORPHANED_JOB_ERROR
+
+def wait_for(job_id: str) -> dict:
+    for _ in range(100):
+        status = get_job_status(job_id)
+        if status["status"] not in ("queued", "running"):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def add_running_job(db, kind: str) -> str:
+    # Left behind by a worker that was killed mid-job: no lease is being renewed
+    db.add(BackgroundJob(id="dead" * 8, kind=kind, status="running", submitted_at=datetime.utcnow()))
+    db.commit()
+    return "dead" * 8
+
+def test_stale_running_job_does_not_block_a_new_submission(db):
+    stale_id = add_running_job(db, "test")
+
+    submitted = submit_job("test", lambda session, report: {"done": 1})
+
+    assert not submitted["already_running"]
+    assert submitted["job_id"] != stale_id
+    assert wait_for(submitted["job_id"])["result"] == {"done": 1}
+    stale = get_job_status(stale_id)
+    assert (stale["status"], stale["error"]) == ("failed", ORPHANED_JOB_ERROR)
+
+def test_live_job_is_returned_instead_of_starting_another(db):
+    def slow(session, report):
+        time.sleep(0.5)
+        return {}
+
+    first = submit_job("test", slow)
+    second = submit_job("test", slow)
+
+    assert second == {"job_id": first["job_id"], "status": second["status"], "already_running": True}
+    assert wait_for(first["job_id"])["status"] == "completed"
+    assert fail_orphaned_jobs() == 0
+
+def test_startup_marks_orphaned_jobs_failed(db):
+    stale_id = add_running_job(db, "test")
+
+    assert fail_orphaned_jobs() == 1
+    assert get_job_status(stale_id)["status"] == "failed"
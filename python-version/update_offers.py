@@ -5,6 +5,7 @@ Update existing offers to ensure proper user payout calculation
 from sqlalchemy.orm import sessionmaker
 from database import engine, Offer
 from offer_utils import calculate_user_payout
+from cache_versions import bump_catalogue_version
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -23,6 +24,8 @@ def update_offer_payouts():
             print(f"Updating {offer.title}: ${offer.user_payout} -> ${correct_user_payout}")
             offer.user_payout = correct_user_payout
     
+    # Invalidate cached offer listings (ETag)
+    bump_catalogue_version(db)
     db.commit()
     db.close()
     print("All offers updated!")
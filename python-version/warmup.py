@@ -0,0 +1,85 @@
+"""
+Worker warm-up
+Runs in the app lifespan, before the worker accepts traffic, so the first
+requests after a deploy or worker restart don't pay for opening database
+connections, compiling templates, building the offer listing serializers or
+loading the bcrypt backend.
+"""
+
+import os
+import time
+import logging
+from typing import Dict
+from sqlalchemy import text
+from fastapi.templating import Jinja2Templates
+import config  # noqa: F401 - loads .env
+from database import SessionLocal, engine
+from models import OfferResponse
+from offer_utils import get_active_offers
+from cache_versions import get_catalogue_version
+from fast_json import model_list_response
+from auth import pwd_context
+
+logger = logging.getLogger(__name__)
+
+# Warm-up Configuration
+APP_WARMUP = os.getenv("APP_WARMUP", "true").lower() == "true"
+# Connections opened up front; defaults to the pool size
+WARMUP_DB_CONNECTIONS = int(os.getenv("WARMUP_DB_CONNECTIONS", "0"))
+
+def open_db_pool() -> int:
+    """Check out (and return) enough connections to fill the pool's steady-state size"""
+    wanted = WARMUP_DB_CONNECTIONS or getattr(engine.pool, "size", lambda: 1)()
+    connections = []
+    try:
+        for _ in range(max(1, wanted)):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+def compile_templates(templates: Jinja2Templates) -> int:
+    """Load every template into the Jinja environment's cache"""
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.env.get_template(name)
+    return len(names)
+
+def fill_offer_listing() -> int:
+    """Run the unfiltered /api/offers query and serialization once"""
+    db = SessionLocal()
+    try:
+        get_catalogue_version(db)
+        offers = get_active_offers(db)
+        model_list_response(OfferResponse, offers)
+        return len(offers)
+    finally:
+        db.close()
+
+def load_password_backend():
+    """passlib picks and loads the bcrypt backend on first use"""
+    pwd_context.handler("bcrypt").get_backend()
+
+def warm_up(templates: Jinja2Templates) -> Dict[str, float]:
+    """Run every warm-up step; a failing step is logged and skipped. Returns milliseconds per step"""
+    steps = (
+        ("db_pool", open_db_pool),
+        ("templates", lambda: compile_templates(templates)),
+        ("offers", fill_offer_listing),
+        ("password_hashing", load_password_backend)
+    )
+    timings = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, e)
+            continue
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    logger.info("Worker warmed up in %.0f ms: %s", sum(timings.values()), timings)
+    return timings